@@ -0,0 +1,96 @@
+"""Fan-out time of ConnectionManager.broadcast_to_poll against subscriber count.
+
+Compares the serialize-once fan-out through per-connection send queues with
+the original strategy of one task and one json.dumps per socket. Both are
+timed until every socket has received the message. Sockets are in-memory
+fakes, so the numbers measure the server-side cost only.
+
+Usage::
+
+    python -m benchmarks.bench_broadcast [subscriber counts...]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from typing import Any, List, Optional
+
+from polling_app import constants as C
+from polling_app.utils.connection_manager import ConnectionManager
+from polling_app.utils.ws_helpers import success_frame
+
+RESULTS: list[dict[str, Any]] = [
+    {"id": f"choice-{i}", "text": f"Choice {i}", "votes": i * 17} for i in range(8)
+]
+
+
+class FakeWebSocket:
+    # Messages delivered across every socket
+    delivered = 0
+
+    def __init__(self):
+        self.sent = 0
+
+    scope: dict[str, Any] = {"subprotocols": []}
+
+    async def accept(self, subprotocol: Optional[str] = None) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        self.sent += 1
+        FakeWebSocket.delivered += 1
+        await asyncio.sleep(0)
+
+
+async def send_success(ws: FakeWebSocket, data: dict) -> None:
+    # The original per-socket send, encoding the frame for every socket
+    await ws.send_text(json.dumps(success_frame(C.ACTION_UPDATE, data)))
+
+
+async def per_socket_tasks(sockets: List[FakeWebSocket], data: dict) -> None:
+    tasks = [asyncio.create_task(send_success(ws, data)) for ws in sockets]
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def measure(subscribers: int, rounds: int = 5) -> tuple[float, float]:
+    manager = ConnectionManager()
+    sockets = [FakeWebSocket() for _ in range(subscribers)]
+    for ws in sockets:
+        await manager.connect(ws)  # type: ignore
+    manager._connections["poll"] = set(manager._clients.values())
+    data = {"poll_id": "poll", "results": RESULTS}
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await per_socket_tasks(sockets, data)
+    before = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        expected = FakeWebSocket.delivered + subscribers
+        await manager.broadcast_to_poll("poll", C.ACTION_UPDATE, data)
+        while FakeWebSocket.delivered < expected:
+            await asyncio.sleep(0)
+    after = (time.perf_counter() - start) / rounds
+
+    for ws in sockets:
+        manager.remove(ws)  # type: ignore
+    return before, after
+
+
+async def main(counts: List[int]) -> None:
+    print(
+        f"{'subscribers':>12} {'per-socket ms':>14} {'fan-out ms':>11} {'speedup':>8}"
+    )
+    for count in counts:
+        before, after = await measure(count)
+        print(
+            f"{count:>12} {before * 1000:>14.2f} {after * 1000:>11.2f}"
+            f" {before / after:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [100, 1000, 5000, 20000]
+    asyncio.run(main(counts))
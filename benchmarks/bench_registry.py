@@ -0,0 +1,71 @@
+"""Memory and churn cost of the ConnectionManager subscription registry.
+
+Connects N in-memory sockets, subscribes them all to one poll, then
+disconnects them all, reporting the bytes held per connection (tracemalloc)
+and the time per subscribe and per disconnect.
+
+Usage::
+
+    python -m benchmarks.bench_registry [connection counts...]
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from typing import Any, List, Optional
+
+from polling_app.utils.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    scope: dict[str, Any] = {"subprotocols": []}
+
+    async def accept(self, subprotocol: Optional[str] = None) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        pass
+
+
+async def measure(connections: int) -> tuple[float, float, float]:
+    manager = ConnectionManager()
+    sockets = [FakeWebSocket() for _ in range(connections)]
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for ws in sockets:
+        await manager.connect(ws)  # type: ignore
+        client = manager._clients[ws]  # type: ignore
+        manager._connections.setdefault("poll", set()).add(client)
+        client.polls.add("poll")
+    subscribe = (time.perf_counter() - start) / connections
+    # Let every writer task reach its first wait
+    await asyncio.sleep(0)
+    held = (tracemalloc.get_traced_memory()[0] - baseline) / connections
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for ws in sockets:
+        manager.remove(ws)  # type: ignore
+    disconnect = (time.perf_counter() - start) / connections
+    await asyncio.sleep(0)
+    return held, subscribe, disconnect
+
+
+async def main(counts: List[int]) -> None:
+    print(
+        f"{'connections':>12} {'bytes/conn':>11} {'connect us':>11} {'remove us':>10}"
+    )
+    for count in counts:
+        held, subscribe, disconnect = await measure(count)
+        print(
+            f"{count:>12} {held:>11.0f} {subscribe * 1e6:>11.2f}"
+            f" {disconnect * 1e6:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [1000, 10000, 50000]
+    asyncio.run(main(counts))
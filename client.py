@@ -1,4 +1,5 @@
 import asyncio
+import json
 import websockets
 import requests
 
@@ -23,11 +24,15 @@ requests.post(
 
 # Step 3: Listen for live updates
 async def listen():
-    uri = f"ws://127.0.0.1:8000/polls/19258e1f-431f-4b51-b4e2-bf5d9d0146fd"
+    # heartbeat=1 promises to answer pings, so a dead connection gets reaped
+    uri = f"ws://127.0.0.1:8000/polls/ws/{poll_id}?heartbeat=1"
     async with websockets.connect(uri) as websocket:
         print("Connected to WebSocket, waiting for updates...")
         while True:
             msg = await websocket.recv()
+            if json.loads(msg).get("action") == "ping":
+                await websocket.send(json.dumps({"action": "pong"}))
+                continue
             print("Live update:", msg)
 
 
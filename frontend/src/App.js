@@ -26,13 +26,18 @@ function App() {
   useEffect(() => {
     if (!selectedPoll) return;
 
-    const socket = new WebSocket(`ws://127.0.0.1:8000/polls/ws/${selectedPoll.id}`);
+    const socket = new WebSocket(`ws://127.0.0.1:8000/polls/ws/${selectedPoll.id}?heartbeat=1`);
     socket.onopen = () => {
       console.log("WebSocket connected");
       setResults([]); // reset results on new connection
     };
     socket.onmessage = event => {
       const data = JSON.parse(event.data);
+      if (data.action === "ping") {
+        // Answer heartbeats so the server keeps the connection
+        socket.send(JSON.stringify({ action: "pong" }));
+        return;
+      }
       console.log("WebSocket message:", data);
       if (data.data && data.data.results)
         setResults(data.data.results);
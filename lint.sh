@@ -1,3 +1,3 @@
-black tests polling_app
-isort tests polling_app
-flake8 --max-line-length 120 tests polling_app
\ No newline at end of file
+black tests polling_app benchmarks
+isort tests polling_app benchmarks
+flake8 --max-line-length 120 tests polling_app benchmarks
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Maintenance commands for existing databases.
+
+Usage::
+
+    python -m polling_app.cli reconcile   # upgrade the schema, backfill counters
+    python -m polling_app.cli check       # compare counters with COUNT(votes)
+    python -m polling_app.cli compact     # fold old vote log segments, server stopped
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from . import crud, models  # noqa: F401 - registers the tables on Base
+from .database import Base, SessionLocal, engine
+from .utils.vote_log import VOTE_LOG_DIR, VOTE_STORE, VoteLog, VoteLogLockedError
+
+
+def upgrade_schema(bind: Engine) -> List[str]:
+    """Add columns and indexes declared on the models but absent from the database.
+
+    create_all() only creates missing tables, so databases created by an
+    older version of the app need this before the new columns are usable.
+    Returns what was added as ``table.column`` or ``index`` names.
+    """
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    added: List[str] = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = (
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                    f"{column.type.compile(bind.dialect)}"
+                )
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+
+    db = SessionLocal(bind=bind)
+    try:
+        # Votes must know their poll before the unique index can be built
+        crud.backfill_vote_poll_ids(db)
+    finally:
+        db.close()
+
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
+                added.append(str(index.name))
+    return added
+
+
+def reconcile(bind: Engine) -> None:
+    for name in upgrade_schema(bind):
+        print(f"added {name}")
+    db = SessionLocal(bind=bind)
+    try:
+        fixed = crud.reconcile_vote_counts(db)
+    finally:
+        db.close()
+    print(f"reconciled {fixed} choice vote counts")
+
+
+def check(bind: Engine) -> int:
+    db = SessionLocal(bind=bind)
+    try:
+        mismatches = crud.find_vote_count_mismatches(db)
+    finally:
+        db.close()
+    for m in mismatches:
+        print(
+            f"poll {m['poll_id']} choice {m['choice_id']}: "
+            f"vote_count={m['vote_count']} counted={m['counted']}"
+        )
+    if mismatches:
+        print(f"{len(mismatches)} inconsistent vote counts")
+        return 1
+    print("vote counts are consistent")
+    return 0
+
+
+def compact(directory: str) -> int:
+    # Only while the server is stopped: the log refuses to open while the
+    # serving process holds it, which compacts with POST /admin/vote-log/compact
+    try:
+        log = VoteLog(directory)
+    except VoteLogLockedError:
+        print(
+            "the vote log is in use, stop the server first "
+            "or use POST /admin/vote-log/compact"
+        )
+        return 1
+    try:
+        deleted = log.compact()
+    finally:
+        log.close()
+    print(f"compacted the vote log, deleted {deleted} segments")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m polling_app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "reconcile", help="upgrade the schema and backfill vote counters"
+    )
+    commands.add_parser("check", help="compare vote counters with COUNT(votes)")
+    commands.add_parser(
+        "compact", help="fold old vote log segments into a tally snapshot"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "reconcile":
+        reconcile(engine)
+        return 0
+    if args.command == "compact":
+        if VOTE_STORE != "log":
+            print("the vote log is not the vote store, set VOTE_STORE=log")
+            return 1
+        return compact(VOTE_LOG_DIR)
+    return check(engine)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,10 +5,19 @@ TYPE_ERROR = "error"
 # Actions
 ACTION_CONNECT = "connect"
 ACTION_SUBSCRIBE = "subscribe"
+ACTION_SUBSCRIBE_MANY = "subscribe_many"
 ACTION_UNSUBSCRIBE = "unsubscribe"
 ACTION_DISCONNECT = "disconnect"
 ACTION_UPDATE = "update"
 ACTION_INITIAL_RESULT = "initial_result"
+ACTION_DELTA = "delta"
+# Heartbeat: the server pings, clients answer with a pong message
+ACTION_PING = "ping"
+ACTION_PONG = "pong"
+
+# Update modes, chosen per connection with the ``mode`` query parameter
+MODE_FULL = "full"
+MODE_DELTA = "delta"
 
 # Error codes
 ERR_UNKNOWN_ACTION = "UNKNOWN_ACTION"
@@ -1,66 +1,826 @@
-from typing import Any
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator, Optional, TypeVar
 
-from sqlalchemy import func
+from sqlalchemy import (
+    DateTime,
+    and_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models, schemas
+from .database import SessionLocal
+from .utils.response_cache import response_cache
+from .utils.tally_cache import tally_cache
+from .utils.vote_log import VOTE_STORE, VoteLog
+
+T = TypeVar("T")
+
+# The vote log, while the process serving requests has it open
+vote_log: Optional[VoteLog] = None
+
+
+def open_vote_log() -> Optional[VoteLog]:
+    # Opened by the serving process only, when the log is the vote store;
+    # maintenance commands importing this module leave it alone
+    global vote_log
+    if VOTE_STORE == "log" and vote_log is None:
+        vote_log = VoteLog()
+    return vote_log
+
+
+def close_vote_log() -> None:
+    global vote_log
+    if vote_log is not None:
+        vote_log.close()
+        vote_log = None
+
+
+class PollNotFoundError(Exception):
+    pass
+
+
+class InvalidChoiceError(Exception):
+    pass
+
+
+class DuplicateVoteError(Exception):
+    pass
+
+
+class PollClosedError(Exception):
+    pass
+
+
+def utc(moment: datetime) -> datetime:
+    # Datetimes are stored in UTC and read back naive
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def stored(moment: datetime) -> datetime:
+    # The naive UTC form DateTime columns are bound with
+    return utc(moment).replace(tzinfo=None)
+
+
+def is_closed(closes_at: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    if closes_at is None:
+        return False
+    return utc(closes_at) <= (now or datetime.now(timezone.utc))
 
 
 def create_poll(db: Session, poll: schemas.PollCreate):
-    db_poll = models.Poll(title=poll.title, question=poll.question)
+    db_poll = models.Poll(
+        title=poll.title,
+        question=poll.question,
+        closes_at=stored(poll.closes_at) if poll.closes_at else None,
+    )
+    db_poll.choices = [
+        models.Choice(text=c.text, position=position)
+        for position, c in enumerate(poll.choices)
+    ]
     db.add(db_poll)
     db.commit()
     db.refresh(db_poll)
-    for c in poll.choices:
-        db_choice = models.Choice(text=c.text, poll_id=db_poll.id)
-        db.add(db_choice)
-    db.commit()
     return db_poll
 
 
+# Deleted polls are hidden at once and their rows purged in the background
+LIVE = models.Poll.deleted_at.is_(None)
+
+
+def _poll_takes_votes(poll_id: str):
+    # The poll exists, is not deleted and has not reached closes_at
+    return exists().where(
+        models.Poll.id == poll_id,
+        LIVE,
+        or_(
+            models.Poll.closes_at.is_(None),
+            models.Poll.closes_at > models.utcnow(),
+        ),
+    )
+
+
+def _rejected_vote(db: Session, poll_id: str, vote: schemas.VoteCreate) -> Exception:
+    # Why a vote the database did not take was rejected
+    poll = get_poll(db, poll_id)
+    if poll is None:
+        return PollNotFoundError(poll_id)
+    if is_closed(poll.closes_at):
+        return PollClosedError(poll_id)
+    return InvalidChoiceError(vote.choice_id)
+
+
 def get_poll(db: Session, poll_id: str):
-    return db.query(models.Poll).filter(models.Poll.id == poll_id).first()
+    return db.query(models.Poll).filter(models.Poll.id == poll_id, LIVE).first()
 
 
 def get_polls(db: Session):
-    return db.query(models.Poll).all()
+    return db.query(models.Poll).filter(LIVE).all()
+
+
+def _logged_votes(poll_id: str, choice_id: str) -> int:
+    # Votes of a choice kept in the vote log rather than in its counter
+    return vote_log.count(poll_id, choice_id) if vote_log is not None else 0
+
+
+def _logged_version(poll_id: str) -> int:
+    # Votes kept in the vote log do not bump the version column, so each one
+    # is added to it
+    return vote_log.total(poll_id) if vote_log is not None else 0
+
+
+def get_poll_version(db: Session, poll_id: str) -> Optional[int]:
+    # Returns None when the poll does not exist
+    version = db.execute(
+        select(models.Poll.version).where(models.Poll.id == poll_id, LIVE)
+    ).scalar()
+    return None if version is None else version + _logged_version(poll_id)
+
+
+# Position of a poll in the list order: (created_at, id)
+PollKey = tuple[datetime, str]
+
+
+def _after_key(after: PollKey):
+    created_at, poll_id = after
+    created_at = stored(created_at)
+    return or_(
+        models.Poll.created_at > created_at,
+        and_(models.Poll.created_at == created_at, models.Poll.id > poll_id),
+    )
+
+
+def _snapshot_query():
+    return (
+        select(
+            models.Poll.id,
+            models.Poll.title,
+            models.Poll.question,
+            models.Poll.version,
+            models.Poll.closes_at,
+            models.Choice.id,
+            models.Choice.text,
+            models.Choice.vote_count,
+        )
+        .select_from(models.Poll)
+        .outerjoin(models.Choice, models.Choice.poll_id == models.Poll.id)
+        .where(LIVE)
+    )
 
 
-def has_user_voted(db: Session, poll_id: str, username: str) -> bool:
-    # Returns True if the user has already voted for the poll
-    subquery = (
-        db.query(models.Vote.id)
-        .join(models.Choice)
-        .filter(models.Vote.username == username, models.Choice.poll_id == poll_id)
+def _group_snapshots(rows) -> Iterator[dict[str, Any]]:
+    # Folds rows ordered by poll into one snapshot per poll
+    snapshot: Optional[dict[str, Any]] = None
+    for poll_id, title, question, version, closes_at, choice_id, text, count in rows:
+        if snapshot is None or snapshot["id"] != poll_id:
+            if snapshot is not None:
+                yield snapshot
+            snapshot = {
+                "id": poll_id,
+                "title": title,
+                "question": question,
+                "version": version + _logged_version(poll_id),
+                "closes_at": utc(closes_at) if closes_at else None,
+                "choices": [],
+            }
+        if choice_id is not None:
+            count += _logged_votes(poll_id, choice_id)
+            snapshot["choices"].append({"id": choice_id, "text": text, "votes": count})
+    if snapshot is not None:
+        yield snapshot
+
+
+def get_poll_snapshots(db: Session, poll_ids: list[str]) -> dict[str, dict[str, Any]]:
+    # Reads polls with their version and results in one statement, so the
+    # version always matches the counts; missing polls are left out
+    rows = db.execute(
+        _snapshot_query()
+        .where(models.Poll.id.in_(poll_ids))
+        .order_by(models.Poll.id, models.Choice.position)
+    )
+    return {snapshot["id"]: snapshot for snapshot in _group_snapshots(rows)}
+
+
+def iter_poll_snapshots(
+    db: Session,
+    after: Optional[PollKey] = None,
+    limit: Optional[int] = None,
+    batch_size: int = 500,
+) -> Iterator[dict[str, Any]]:
+    # Streams polls with their results in list order from a server-side
+    # cursor, so only one batch of rows is held at a time
+    page = select(models.Poll.id).where(LIVE)
+    if after is not None:
+        page = page.where(_after_key(after))
+    if limit is not None:
+        page = page.order_by(models.Poll.created_at, models.Poll.id).limit(limit)
+    rows = db.execute(
+        _snapshot_query()
+        .where(models.Poll.id.in_(page))
+        .order_by(models.Poll.created_at, models.Poll.id, models.Choice.position)
+        .execution_options(yield_per=batch_size)
     )
-    return db.query(subquery.exists()).scalar()
+    yield from _group_snapshots(rows)
+
 
+def get_poll_versions(
+    db: Session, after: Optional[PollKey] = None, limit: Optional[int] = None
+) -> list[tuple[str, int, datetime]]:
+    # Returns (id, version, created_at) of the polls in list order
+    stmt = select(models.Poll.id, models.Poll.version, models.Poll.created_at)
+    stmt = stmt.where(LIVE)
+    if after is not None:
+        stmt = stmt.where(_after_key(after))
+    stmt = stmt.order_by(models.Poll.created_at, models.Poll.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [
+        (poll_id, version + _logged_version(poll_id), created_at)
+        for poll_id, version, created_at in db.execute(stmt)
+    ]
 
-def create_vote(db: Session, vote: schemas.VoteCreate):
-    db_vote = models.Vote(username=vote.username, choice_id=vote.choice_id)
-    db.add(db_vote)
+
+def create_vote(db: Session, poll_id: str, vote: schemas.VoteCreate) -> str:
+    if vote_log is not None:
+        return _log_vote(db, vote_log, poll_id, vote)
+    # Inserts the vote only if the choice belongs to the poll; the unique
+    # (poll_id, username) index rejects a second vote by the same user
+    vote_id = models.gen_id()
+    choice = select(
+        literal(vote_id),
+        models.Choice.poll_id,
+        models.Choice.id,
+        literal(vote.username),
+        literal(models.utcnow(), DateTime),
+    ).where(
+        models.Choice.id == vote.choice_id,
+        models.Choice.poll_id == poll_id,
+        _poll_takes_votes(poll_id),
+    )
+    stmt = insert(models.Vote).from_select(
+        ["id", "poll_id", "choice_id", "username", "timestamp"], choice
+    )
+    try:
+        inserted = db.execute(stmt).rowcount
+    except IntegrityError:
+        db.rollback()
+        raise DuplicateVoteError(poll_id, vote.username)
+    if not inserted:
+        db.rollback()
+        raise _rejected_vote(db, poll_id, vote)
+    # Same transaction as the insert, so the counter never drifts
+    db.execute(
+        update(models.Choice)
+        .where(models.Choice.id == vote.choice_id)
+        .values(vote_count=models.Choice.vote_count + 1)
+    )
+    db.execute(
+        update(models.Poll)
+        .where(models.Poll.id == poll_id)
+        .values(version=models.Poll.version + 1)
+    )
     db.commit()
-    db.refresh(db_vote)
-    return db_vote
+    tally_cache.increment(poll_id, vote.choice_id)
+    return vote_id
 
 
-def get_poll_results(db: Session, poll_id: str):
-    choices = db.query(models.Choice).filter(models.Choice.poll_id == poll_id).all()
-    results: list[dict[str, Any]] = []
-    for c in choices:
-        count = (
-            db.query(func.count(models.Vote.id))
-            .filter(models.Vote.choice_id == c.id)
-            .scalar()
+def _log_vote(db: Session, log: VoteLog, poll_id: str, vote: schemas.VoteCreate) -> str:
+    # Records the vote in the vote log; the database is only read, to check
+    # the choice belongs to the poll
+    choice_poll = db.execute(
+        select(models.Choice.poll_id).where(
+            models.Choice.id == vote.choice_id, _poll_takes_votes(poll_id)
+        )
+    ).scalar()
+    if choice_poll != poll_id:
+        raise _rejected_vote(db, poll_id, vote)
+    if not log.append(poll_id, vote.choice_id, vote.username):
+        raise DuplicateVoteError(poll_id, vote.username)
+    tally_cache.increment(poll_id, vote.choice_id)
+    # Logged votes have no row, hence no id of their own
+    return ""
+
+
+# Details of the votes a batch rejects, as the single vote route words them
+POLL_NOT_FOUND = "Poll not found"
+POLL_CLOSED = "Poll is closed"
+INVALID_CHOICE = "Invalid choice"
+ALREADY_VOTED = "User has already voted in this poll"
+
+
+def create_votes(
+    db: Session, poll_id: str, votes: list[schemas.VoteCreate]
+) -> list[dict[str, Any]]:
+    """Cast a batch of votes for a poll in one transaction.
+
+    Choices and earlier votes are checked for the whole batch with one query
+    each, the accepted votes are inserted with a single executemany and the
+    counters bumped once per choice. Returns one outcome per vote, in order.
+    """
+    return create_votes_for_polls(db, {poll_id: votes})[poll_id]
+
+
+def create_votes_for_polls(
+    db: Session, votes: dict[str, list[schemas.VoteCreate]], retry: bool = True
+) -> dict[str, list[dict[str, Any]]]:
+    """Cast batches of votes for several polls, all in one transaction."""
+    try:
+        staged = {
+            poll_id: _stage_votes(db, poll_id, batch)
+            for poll_id, batch in votes.items()
+        }
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if not retry:
+            raise
+        # A user voted through another request since the check: check again
+        return create_votes_for_polls(db, votes, retry=False)
+    for poll_id, (_, counts) in staged.items():
+        for choice_id, amount in counts.items():
+            tally_cache.increment(poll_id, choice_id, amount)
+    return {poll_id: outcomes for poll_id, (outcomes, _) in staged.items()}
+
+
+def _stage_votes(
+    db: Session, poll_id: str, votes: list[schemas.VoteCreate]
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    # Writes the accepted votes of one poll, uncommitted; returns the outcomes
+    # and the number of votes added to each choice
+    choices = set(
+        db.scalars(
+            select(models.Choice.id).where(
+                models.Choice.poll_id == poll_id, _poll_takes_votes(poll_id)
+            )
+        )
+    )
+    if not choices:
+        poll = get_poll(db, poll_id)
+        if poll is None:
+            return [{"status": "error", "detail": POLL_NOT_FOUND} for _ in votes], {}
+        if is_closed(poll.closes_at):
+            return [{"status": "error", "detail": POLL_CLOSED} for _ in votes], {}
+    if vote_log is not None:
+        return _log_votes(vote_log, poll_id, votes, choices)
+    usernames = {vote.username for vote in votes}
+    voted = set(
+        db.scalars(
+            select(models.Vote.username).where(
+                models.Vote.poll_id == poll_id, models.Vote.username.in_(usernames)
+            )
+        )
+    )
+    now = models.utcnow()
+    outcomes: list[dict[str, Any]] = []
+    rows: list[dict[str, Any]] = []
+    counts: dict[str, int] = {}
+    for vote in votes:
+        if vote.choice_id not in choices:
+            outcomes.append({"status": "error", "detail": INVALID_CHOICE})
+        elif vote.username in voted:
+            # Voted before or earlier in the batch
+            outcomes.append({"status": "error", "detail": ALREADY_VOTED})
+        else:
+            voted.add(vote.username)
+            vote_id = models.gen_id()
+            rows.append(
+                {
+                    "id": vote_id,
+                    "poll_id": poll_id,
+                    "choice_id": vote.choice_id,
+                    "username": vote.username,
+                    "timestamp": now,
+                }
+            )
+            counts[vote.choice_id] = counts.get(vote.choice_id, 0) + 1
+            outcomes.append({"status": "ok", "id": vote_id})
+    if not rows:
+        return outcomes, counts
+    db.execute(insert(models.Vote), rows)
+    # Core statement, so the parameter list runs as one executemany
+    choices_table = models.Choice.__table__
+    db.execute(
+        update(choices_table)
+        .where(choices_table.c.id == bindparam("choice_id"))
+        .values(vote_count=choices_table.c.vote_count + bindparam("amount")),
+        [{"choice_id": c, "amount": n} for c, n in counts.items()],
+    )
+    db.execute(
+        update(models.Poll)
+        .where(models.Poll.id == poll_id)
+        .values(version=models.Poll.version + 1)
+    )
+    return outcomes, counts
+
+
+def _log_votes(
+    log: VoteLog, poll_id: str, votes: list[schemas.VoteCreate], choices: set[str]
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    # Records the valid votes of one poll in the vote log with a single write
+    valid = [vote for vote in votes if vote.choice_id in choices]
+    recorded = iter(
+        log.append_many(poll_id, [(v.choice_id, v.username) for v in valid])
+    )
+    outcomes: list[dict[str, Any]] = []
+    counts: dict[str, int] = {}
+    for vote in votes:
+        if vote.choice_id not in choices:
+            outcomes.append({"status": "error", "detail": INVALID_CHOICE})
+        elif not next(recorded):
+            outcomes.append({"status": "error", "detail": ALREADY_VOTED})
+        else:
+            counts[vote.choice_id] = counts.get(vote.choice_id, 0) + 1
+            outcomes.append({"status": "ok"})
+    return outcomes, counts
+
+
+def get_results_for_polls(
+    db: Session, poll_ids: list[str]
+) -> dict[str, list[dict[str, Any]]]:
+    # Serves cached tallies and reads the rest from the choice counters
+    results: dict[str, list[dict[str, Any]]] = {}
+    missing: list[str] = []
+    for poll_id in poll_ids:
+        cached = tally_cache.get(poll_id)
+        if cached is None:
+            missing.append(poll_id)
+            results[poll_id] = []
+        else:
+            results[poll_id] = cached
+    if not missing:
+        return results
+    generation = tally_cache.generation()
+    rows = (
+        db.query(
+            models.Choice.poll_id,
+            models.Choice.id,
+            models.Choice.text,
+            models.Choice.vote_count,
         )
-        results.append({"id": c.id, "text": c.text, "votes": count})
+        .join(models.Poll, models.Poll.id == models.Choice.poll_id)
+        # Choices of deleted polls stay until purged, and must not be cached
+        .filter(models.Choice.poll_id.in_(missing), LIVE)
+        .order_by(models.Choice.poll_id, models.Choice.position)
+        .all()
+    )
+    for poll_id, choice_id, text, count in rows:
+        count += _logged_votes(poll_id, choice_id)
+        results[poll_id].append({"id": choice_id, "text": text, "votes": count})
+    for poll_id in missing:
+        if results[poll_id]:
+            tally_cache.put(poll_id, results[poll_id], generation)
+    return results
+
+
+def find_poll_results(db: Session, poll_id: str) -> Optional[list[dict[str, Any]]]:
+    # Results of a poll, None when it does not exist; one query checks both
+    cached = tally_cache.get(poll_id)
+    if cached is not None:
+        return cached
+    generation = tally_cache.generation()
+    rows = db.execute(
+        select(models.Choice.id, models.Choice.text, models.Choice.vote_count)
+        .select_from(models.Poll)
+        .outerjoin(models.Choice, models.Choice.poll_id == models.Poll.id)
+        .where(models.Poll.id == poll_id, LIVE)
+        .order_by(models.Choice.position)
+    ).all()
+    if not rows:
+        return None
+    results = [
+        {
+            "id": choice_id,
+            "text": text,
+            "votes": count + _logged_votes(poll_id, choice_id),
+        }
+        for choice_id, text, count in rows
+        if choice_id is not None
+    ]
+    if results:
+        tally_cache.put(poll_id, results, generation)
     return results
 
 
+def get_poll_results(db: Session, poll_id: str):
+    return get_results_for_polls(db, [poll_id])[poll_id]
+
+
 def delete_poll(db: Session, poll_id: str):
-    poll = db.query(models.Poll).filter(models.Poll.id == poll_id).first()
-    if poll:
-        db.delete(poll)
-        db.commit()
+    # Only marks the poll deleted, which hides it; purge_poll_chunk() then
+    # deletes its rows without loading them
+    deleted = db.execute(
+        update(models.Poll)
+        .where(models.Poll.id == poll_id, LIVE)
+        .values(deleted_at=models.utcnow())
+    ).rowcount
+    db.commit()
+    if deleted:
+        tally_cache.invalidate(poll_id)
+        response_cache.invalidate(poll_id)
+        if vote_log is not None:
+            vote_log.forget(poll_id)
         return True
     return False
+
+
+def purge_poll_chunk(db: Session, poll_id: str, limit: int) -> int:
+    # Deletes up to limit votes of a deleted poll with one bulk statement,
+    # and with the last of them its choices and the poll itself; returns the
+    # number of votes deleted
+    deleted = _delete_votes(db, poll_id, limit)
+    if deleted < limit:
+        db.execute(
+            delete(models.Choice)
+            .where(models.Choice.poll_id == poll_id)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(models.Poll)
+            .where(models.Poll.id == poll_id, models.Poll.deleted_at.is_not(None))
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return deleted
+
+
+def _delete_votes(db: Session, poll_id: str, limit: int) -> int:
+    chunk = select(models.Vote.id).where(models.Vote.poll_id == poll_id).limit(limit)
+    return db.execute(
+        delete(models.Vote)
+        .where(models.Vote.id.in_(chunk))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def get_deleted_poll_ids(db: Session) -> list[str]:
+    # Polls deleted but not purged yet, such as by a process that stopped
+    return list(
+        db.scalars(select(models.Poll.id).where(models.Poll.deleted_at.is_not(None)))
+    )
+
+
+def get_closing_polls(db: Session) -> dict[str, datetime]:
+    # closes_at of the polls that have one and are not closed yet
+    rows = db.execute(
+        select(models.Poll.id, models.Poll.closes_at).where(
+            models.Poll.closes_at.is_not(None), models.Poll.closed_at.is_(None), LIVE
+        )
+    )
+    return {poll_id: utc(closes_at) for poll_id, closes_at in rows}
+
+
+def close_due_polls(db: Session, now: datetime) -> list[str]:
+    # Marks the polls whose closes_at has passed closed; their vote counters
+    # are final from then on. Returns the polls closed
+    now = stored(now)
+    due = list(
+        db.scalars(
+            select(models.Poll.id).where(
+                models.Poll.closes_at <= now, models.Poll.closed_at.is_(None), LIVE
+            )
+        )
+    )
+    if due:
+        db.execute(
+            update(models.Poll)
+            .where(models.Poll.id.in_(due))
+            .values(closed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return due
+
+
+def get_archivable_poll_ids(db: Session, closed_before: datetime) -> list[str]:
+    # Polls closed before the cutoff whose votes are still in the votes table
+    return list(
+        db.scalars(
+            select(models.Poll.id).where(
+                models.Poll.closed_at <= stored(closed_before),
+                models.Poll.archived_at.is_(None),
+                LIVE,
+            )
+        )
+    )
+
+
+def iter_poll_votes(
+    db: Session, poll_id: str, chunk_size: int
+) -> Iterator[list[tuple[str, str, str, datetime]]]:
+    # (id, choice_id, username, timestamp) of a poll's votes, oldest first,
+    # fetched chunk_size rows at a time from a server-side cursor
+    rows = db.execute(
+        select(
+            models.Vote.id,
+            models.Vote.choice_id,
+            models.Vote.username,
+            models.Vote.timestamp,
+        )
+        .where(models.Vote.poll_id == poll_id)
+        .order_by(models.Vote.timestamp, models.Vote.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for chunk in rows.partitions():
+        yield [tuple(row) for row in chunk]
+
+
+def delete_archived_votes(db: Session, poll_id: str, limit: int) -> int:
+    # Deletes up to limit votes of an archived poll, returns the number deleted
+    deleted = _delete_votes(db, poll_id, limit)
+    db.commit()
+    return deleted
+
+
+def mark_archived(db: Session, poll_id: str) -> None:
+    db.execute(
+        update(models.Poll)
+        .where(models.Poll.id == poll_id)
+        .values(archived_at=models.utcnow())
+    )
+    db.commit()
+
+
+# Archived polls keep their counters, while their votes left the votes table
+NOT_ARCHIVED = ~exists().where(
+    models.Poll.id == models.Choice.poll_id, models.Poll.archived_at.is_not(None)
+)
+
+
+def count_votes_by_choice(db: Session) -> dict[str, int]:
+    # Counts the votes table itself, ignoring the denormalized counters
+    rows = (
+        db.query(models.Choice.id, func.count(models.Vote.id))
+        .outerjoin(models.Vote, models.Vote.choice_id == models.Choice.id)
+        .group_by(models.Choice.id)
+        .all()
+    )
+    return {choice_id: count for choice_id, count in rows}
+
+
+def find_vote_count_mismatches(db: Session) -> list[dict[str, Any]]:
+    # Returns the choices whose vote_count differs from COUNT(votes)
+    counted = count_votes_by_choice(db)
+    mismatches: list[dict[str, Any]] = []
+    for choice_id, poll_id, vote_count in db.query(
+        models.Choice.id, models.Choice.poll_id, models.Choice.vote_count
+    ).filter(NOT_ARCHIVED):
+        if vote_count != counted.get(choice_id, 0):
+            mismatches.append(
+                {
+                    "choice_id": choice_id,
+                    "poll_id": poll_id,
+                    "vote_count": vote_count,
+                    "counted": counted.get(choice_id, 0),
+                }
+            )
+    return mismatches
+
+
+def backfill_vote_poll_ids(db: Session) -> int:
+    # Copies poll_id from the choice onto votes stored before it existed
+    poll_id = (
+        select(models.Choice.poll_id)
+        .where(models.Choice.id == models.Vote.choice_id)
+        .scalar_subquery()
+    )
+    filled = db.execute(
+        update(models.Vote)
+        .where(models.Vote.poll_id.is_(None))
+        .values(poll_id=poll_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return filled
+
+
+def reconcile_vote_counts(db: Session) -> int:
+    # Rewrites every drifted vote_count from COUNT(votes), returns rows fixed
+    counted = (
+        db.query(func.count(models.Vote.id))
+        .filter(models.Vote.choice_id == models.Choice.id)
+        .scalar_subquery()
+    )
+    fixed = db.execute(
+        update(models.Choice)
+        .where(models.Choice.vote_count != counted, NOT_ARCHIVED)
+        .values(vote_count=counted)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if fixed:
+        # Results changed without votes, so cached responses must not validate
+        db.execute(update(models.Poll).values(version=models.Poll.version + 1))
+    db.commit()
+    tally_cache.clear()
+    return fixed
+
+
+# Awaitable variants for the async routes. They run the functions above on
+# an AsyncSession, whose driver awaits the I/O instead of blocking the loop.
+
+
+async def poll_exists_async(db: AsyncSession, poll_id: str) -> bool:
+    stmt = select(models.Poll.id).where(models.Poll.id == poll_id, LIVE)
+    return (await db.execute(stmt)).first() is not None
+
+
+async def get_existing_poll_ids_async(
+    db: AsyncSession, poll_ids: list[str]
+) -> set[str]:
+    stmt = select(models.Poll.id).where(models.Poll.id.in_(poll_ids), LIVE)
+    return set((await db.execute(stmt)).scalars())
+
+
+def _in_own_session(write: Callable[..., T], *args: Any) -> T:
+    with SessionLocal() as db:
+        return write(db, *args)
+
+
+async def _write(db: AsyncSession, write: Callable[..., T], *args: Any) -> T:
+    # Vote log appends fsync, so with the log as the vote store writes run in
+    # a worker thread, with a sync session, rather than on the event loop
+    if vote_log is not None:
+        return await asyncio.to_thread(_in_own_session, write, *args)
+    return await db.run_sync(write, *args)
+
+
+async def create_vote_async(
+    db: AsyncSession, poll_id: str, vote: schemas.VoteCreate
+) -> str:
+    return await _write(db, create_vote, poll_id, vote)
+
+
+async def create_votes_async(
+    db: AsyncSession, poll_id: str, votes: list[schemas.VoteCreate]
+) -> list[dict[str, Any]]:
+    return await _write(db, create_votes, poll_id, votes)
+
+
+async def create_votes_for_polls_async(
+    db: AsyncSession, votes: dict[str, list[schemas.VoteCreate]]
+) -> dict[str, list[dict[str, Any]]]:
+    return await _write(db, create_votes_for_polls, votes)
+
+
+async def get_results_for_polls_async(
+    db: AsyncSession, poll_ids: list[str]
+) -> dict[str, list[dict[str, Any]]]:
+    return await db.run_sync(get_results_for_polls, poll_ids)
+
+
+async def find_poll_results_async(
+    db: AsyncSession, poll_id: str
+) -> Optional[list[dict[str, Any]]]:
+    return await db.run_sync(find_poll_results, poll_id)
+
+
+async def get_poll_results_async(db: AsyncSession, poll_id: str):
+    return await db.run_sync(get_poll_results, poll_id)
+
+
+async def delete_poll_async(db: AsyncSession, poll_id: str):
+    return await _write(db, delete_poll, poll_id)
+
+
+async def purge_poll_chunk_async(db: AsyncSession, poll_id: str, limit: int) -> int:
+    return await db.run_sync(purge_poll_chunk, poll_id, limit)
+
+
+async def get_deleted_poll_ids_async(db: AsyncSession) -> list[str]:
+    return await db.run_sync(get_deleted_poll_ids)
+
+
+async def get_closing_polls_async(db: AsyncSession) -> dict[str, datetime]:
+    return await db.run_sync(get_closing_polls)
+
+
+async def close_due_polls_async(db: AsyncSession, now: datetime) -> list[str]:
+    return await db.run_sync(close_due_polls, now)
+
+
+async def get_archivable_poll_ids_async(
+    db: AsyncSession, closed_before: datetime
+) -> list[str]:
+    return await db.run_sync(get_archivable_poll_ids, closed_before)
+
+
+async def delete_archived_votes_async(
+    db: AsyncSession, poll_id: str, limit: int
+) -> int:
+    return await db.run_sync(delete_archived_votes, poll_id, limit)
+
+
+async def mark_archived_async(db: AsyncSession, poll_id: str) -> None:
+    await db.run_sync(mark_archived, poll_id)
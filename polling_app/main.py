@@ -1,17 +1,44 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import crud
 from .database import Base, engine
-from .routers import admin, polls, voting, websockets
+from .routers import admin, events, polls, voting, websockets
+from .utils.connection_manager import connection_manager
+from .utils.poll_closer import poll_closer
+from .utils.poll_purger import poll_purger
+from .utils.vote_writer import vote_writer
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Polling App")
 
-# Include all routers
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The serving process owns the vote log, when it is the vote store
+    crud.open_vote_log()
+    await connection_manager.start()
+    await vote_writer.start()
+    await poll_purger.start()
+    await poll_closer.start()
+    yield
+    await poll_closer.stop()
+    await poll_purger.stop()
+    # Pending votes are committed and broadcast before the manager stops
+    await vote_writer.stop()
+    await connection_manager.stop()
+    crud.close_vote_log()
+
+
+app = FastAPI(title="Polling App", lifespan=lifespan)
+
+# Include all routers. The websockets router goes first so that
+# /polls/stats is not taken for a poll id
+app.include_router(websockets.router)
 app.include_router(polls.router)
 app.include_router(voting.router)
-app.include_router(websockets.router)
+app.include_router(events.router)
 app.include_router(admin.router)
 
 origins = [
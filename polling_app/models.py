@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -11,12 +11,30 @@ def gen_id():
     return str(uuid.uuid4())
 
 
+def utcnow() -> datetime:
+    # DateTime columns hold naive UTC, which every driver binds to a
+    # timestamp without time zone; asyncpg rejects aware datetimes there
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Poll(Base):
     __tablename__ = "polls"
+    # Keyset pagination order of the poll list
+    __table_args__ = (Index("ix_polls_created_at_id", "created_at", "id"),)
     id = Column(String, primary_key=True, default=gen_id)
     title = Column(String, nullable=False)
     question = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    # Bumped by every vote, so responses can be validated with an ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Set when the poll is deleted, before its rows are purged
+    deleted_at = Column(DateTime, nullable=True)
+    # When the poll stops taking votes, in UTC; None keeps it open
+    closes_at = Column(DateTime, nullable=True)
+    # Set once closed, which freezes the vote counters as the final tallies
+    closed_at = Column(DateTime, nullable=True)
+    # Set once the votes are moved out of the votes table to the poll archive
+    archived_at = Column(DateTime, nullable=True)
     choices = relationship("Choice", back_populates="poll", cascade="all, delete")
 
 
@@ -24,15 +42,24 @@ class Choice(Base):
     __tablename__ = "choices"
     id = Column(String, primary_key=True, default=gen_id)
     text = Column(String, nullable=False)
-    poll_id = Column(String, ForeignKey("polls.id"))
+    position = Column(Integer, nullable=False, default=0, server_default="0")
+    # Denormalized COUNT(votes), kept in step by crud.create_vote
+    vote_count = Column(Integer, nullable=False, default=0, server_default="0")
+    poll_id = Column(String, ForeignKey("polls.id"), index=True)
     poll = relationship("Poll", back_populates="choices")
     votes = relationship("Vote", back_populates="choice", cascade="all, delete")
 
 
 class Vote(Base):
     __tablename__ = "votes"
+    # One vote per user and poll, enforced by the database
+    __table_args__ = (
+        Index("ix_votes_poll_id_username", "poll_id", "username", unique=True),
+    )
     id = Column(String, primary_key=True, default=gen_id)
-    choice_id = Column(String, ForeignKey("choices.id"))
+    # Denormalized from the choice so the unique index can cover the poll
+    poll_id = Column(String, ForeignKey("polls.id"), nullable=False)
+    choice_id = Column(String, ForeignKey("choices.id"), index=True)
     username = Column(String, nullable=False)
-    timestamp = Column(DateTime, default=datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=utcnow)
     choice = relationship("Choice", back_populates="votes")
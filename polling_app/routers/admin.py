@@ -1,30 +1,40 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from polling_app.utils.connection_manager import connection_manager
+from polling_app.utils.poll_closer import poll_closer
+from polling_app.utils.poll_purger import poll_purger
 
 from .. import crud
-from ..database import SessionLocal
+from ..database import get_async_db
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.delete("/polls/{poll_id}")
-async def delete_poll(poll_id: str, db: Session = Depends(get_db)):
+async def delete_poll(poll_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a poll and notify all subscribers."""
-    success = crud.delete_poll(db, poll_id)
+    success = await crud.delete_poll_async(db, poll_id)
     if not success:
         raise HTTPException(status_code=404, detail="Poll not found")
+    poll_purger.schedule(poll_id)
+    poll_closer.forget(poll_id)
 
     # Clean up WebSocket connections and notify subscribers
     await connection_manager.cleanup_poll(poll_id)
 
     return {"status": "deleted"}
+
+
+@router.post("/vote-log/compact")
+async def compact_vote_log():
+    """Fold old vote log segments into a snapshot, in the process that owns the log."""
+    log = crud.vote_log
+    if log is None:
+        raise HTTPException(
+            status_code=409, detail="The vote log is not the vote store"
+        )
+    deleted = await asyncio.to_thread(log.compact)
+    return {"deleted_segments": deleted}
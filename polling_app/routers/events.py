@@ -0,0 +1,49 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
+
+from polling_app.utils.connection_manager import connection_manager
+from polling_app.utils.event_stream import (
+    EVENT_STREAM_CODEC,
+    EventStream,
+    parse_last_event_id,
+)
+
+router = APIRouter(prefix="/polls", tags=["events"])
+
+
+async def stream_events(sink: EventStream) -> AsyncIterator[str]:
+    """Relay a sink's events until its poll is deleted or the client leaves."""
+    try:
+        async for event in sink.events():
+            yield event
+            if not connection_manager.get_subscribed_polls(sink):
+                # The poll was deleted, its last event has been sent
+                return
+    finally:
+        connection_manager.remove(sink)
+
+
+@router.get("/{poll_id}/events")
+async def poll_events(poll_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events stream of a poll's live results, for read-only clients.
+    The first event carries the results, later ones only the changed counts.
+    A reconnect with Last-Event-ID gets just the changes it missed.
+    """
+    sink = EventStream()
+    connection_manager.attach(sink, delta=True, codec=EVENT_STREAM_CODEC)
+    epoch, last_seq = parse_last_event_id(last_event_id)
+    subscribed = await connection_manager.subscribe_to_poll(
+        sink, poll_id, last_seq=last_seq, epoch=epoch
+    )
+    if not subscribed:
+        connection_manager.remove(sink)
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    return StreamingResponse(
+        stream_events(sink),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,16 +1,31 @@
 import asyncio
-from typing import Any, List
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from polling_app.utils.connection_manager import connection_manager
+from polling_app.utils.etags import collection_etag, etag_matches, poll_etag
+from polling_app.utils.poll_closer import poll_closer
+from polling_app.utils.poll_purger import poll_purger
+from polling_app.utils.response_cache import response_cache
+from polling_app.utils.single_flight import http_reads
 
 from .. import crud, schemas
-from ..database import SessionLocal
+from ..database import SessionLocal, get_async_db
 
 router = APIRouter(prefix="/polls", tags=["polls"])
 
+# Largest page the poll list serves
+MAX_PAGE_SIZE = int(os.getenv("POLL_PAGE_SIZE_MAX", "1000"))
+NDJSON = "application/x-ndjson"
+
 
 def get_db():
     db = SessionLocal()
@@ -26,49 +41,160 @@ def create_poll(
 ) -> dict[str, Any]:
     """Create a new poll with choices."""
     db_poll = crud.create_poll(db, poll)
+    poll_closer.watch(str(db_poll.id), db_poll.closes_at)
     results = crud.get_poll_results(db, str(db_poll.id))
     return {
         "id": db_poll.id,
         "title": db_poll.title,
         "question": db_poll.question,
         "choices": results,
+        "closes_at": crud.utc(db_poll.closes_at) if db_poll.closes_at else None,
     }
 
 
+def render_polls(
+    db: Session, versions: list[tuple[str, int]]
+) -> list[tuple[str, int, bytes]]:
+    """(poll_id, version, body) of polls rendered as PollOut.
+
+    Bodies cached at the given versions are reused as is; the others are
+    read in one query, validated and encoded once, then cached. Those may be
+    at a newer version than asked for, which is the version returned.
+    """
+    bodies: dict[str, tuple[int, bytes]] = {}
+    missing = []
+    for poll_id, version in versions:
+        body = response_cache.get(poll_id, version)
+        if body is None:
+            missing.append(poll_id)
+        else:
+            bodies[poll_id] = (version, body)
+    if missing:
+        for poll_id, snapshot in crud.get_poll_snapshots(db, missing).items():
+            body = schemas.PollOut.model_validate(snapshot).model_dump_json().encode()
+            response_cache.put(poll_id, snapshot["version"], body)
+            bodies[poll_id] = (snapshot["version"], body)
+    # Polls deleted since their version was read are left out
+    return [(poll_id, *bodies[poll_id]) for poll_id, _ in versions if poll_id in bodies]
+
+
+def encode_cursor(created_at: datetime, poll_id: str) -> str:
+    """Opaque cursor pointing just after a poll in the list order."""
+    raw = json.dumps([created_at.isoformat(), poll_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> crud.PollKey:
+    try:
+        created_at, poll_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), str(poll_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def stream_polls(
+    after: Optional[crud.PollKey], limit: Optional[int]
+) -> Iterator[bytes]:
+    """NDJSON lines of polls with their results, read from a server-side cursor."""
+    # Runs after the request's dependencies are closed, so it has its own session
+    db = SessionLocal()
+    try:
+        for snapshot in crud.iter_poll_snapshots(db, after, limit):
+            yield schemas.PollOut.model_validate(snapshot).model_dump_json().encode()
+            yield b"\n"
+    finally:
+        db.close()
+
+
 @router.get("/", response_model=List[schemas.PollOut])
-def list_polls(db: Session = Depends(get_db)):
-    """List all polls with their results."""
-    polls = crud.get_polls(db)
-    out: list[dict[str, Any]] = []
-    for p in polls:
-        results = crud.get_poll_results(db, str(p.id))
-        out.append(
-            {"id": p.id, "title": p.title, "question": p.question, "choices": results}
+def list_polls(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    List polls with their results, oldest first.
+    With a limit one page is returned, and a Link header points to the next
+    page while there is one. Accept: application/x-ndjson streams one poll
+    per line instead of building the whole list.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    headers: dict[str, str] = {}
+    rows = None
+    if limit is not None:
+        # One extra row tells whether there is a next page
+        rows = crud.get_poll_versions(db, after, limit + 1)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            poll_id, _, created_at = rows[-1]
+            next_url = request.url.include_query_params(
+                cursor=encode_cursor(created_at, poll_id)
+            )
+            headers["Link"] = f'<{next_url}>; rel="next"'
+
+    if accept and NDJSON in accept:
+        return StreamingResponse(
+            stream_polls(after, limit), media_type=NDJSON, headers=headers
         )
-    return out
+
+    if rows is None:
+        rows = crud.get_poll_versions(db, after)
+    versions = [(poll_id, version) for poll_id, version, _ in rows]
+    headers["ETag"] = collection_etag(versions)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    rendered = render_polls(db, versions)
+    # Labels the bodies actually rendered, which may be newer than versions
+    headers["ETag"] = collection_etag([(p, v) for p, v, _ in rendered])
+    body = b"[" + b",".join(body for _, _, body in rendered) + b"]"
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @router.get("/{poll_id}", response_model=schemas.PollOut)
-def get_poll(poll_id: str, db: Session = Depends(get_db)) -> dict[str, Any]:
-    """Get a specific poll with its results."""
-    poll = crud.get_poll(db, poll_id)
-    if not poll:
+def get_poll(
+    poll_id: str,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Any:
+    """Get a specific poll with its results.
+
+    Concurrent requests for the same poll share the version read and, on a
+    cache miss, the rendering.
+    """
+    since = http_reads.mark()
+    version = http_reads.do(
+        ("version", poll_id), lambda: crud.get_poll_version(db, poll_id), since
+    )
+    if version is None:
         raise HTTPException(status_code=404, detail="Poll not found")
-    results = crud.get_poll_results(db, str(poll.id))
-    return {
-        "id": poll.id,
-        "title": poll.title,
-        "question": poll.question,
-        "choices": results,
-    }
+    etag = poll_etag(poll_id, version)
+    # A revalidation that matches never reaches the tally path
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    rendered = http_reads.do(
+        ("render", poll_id, version),
+        lambda: render_polls(db, [(poll_id, version)]),
+        since,
+    )
+    if not rendered:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    # The snapshot rendered may be newer than the version read first
+    _, version, body = rendered[0]
+    etag = poll_etag(poll_id, version)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.delete("/{poll_id}")
-async def delete_poll(poll_id: str, db: Session = Depends(get_db)):
+async def delete_poll(poll_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a poll."""
-    success = crud.delete_poll(db, poll_id)
+    success = await crud.delete_poll_async(db, poll_id)
     if not success:
         raise HTTPException(status_code=404, detail="Poll not found")
+    poll_purger.schedule(poll_id)
+    poll_closer.forget(poll_id)
     asyncio.create_task(connection_manager.cleanup_poll(poll_id))
 
     return {"status": "deleted"}
@@ -1,45 +1,162 @@
-from typing import Any
+import json
+import os
+from typing import Any, AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from polling_app import constants as C
 from polling_app.utils.connection_manager import connection_manager
+from polling_app.utils.poll_closer import poll_closer
+from polling_app.utils.vote_writer import vote_writer
 
 from .. import crud, schemas
-from ..database import SessionLocal
+from ..database import get_async_db
 
 router = APIRouter(prefix="/polls", tags=["voting"])
 
+# Votes of a batch committed and broadcast together
+VOTE_BATCH_CHUNK_SIZE = int(os.getenv("VOTE_BATCH_CHUNK_SIZE", "1000"))
+NDJSON = "application/x-ndjson"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+async def publish_results(db: AsyncSession, poll_id: str) -> None:
+    """Broadcast a poll's results to its subscribers after votes."""
+    if connection_manager.coalescing:
+        connection_manager.mark_dirty(poll_id)
+    else:
+        response_data: dict[str, Any] = {
+            "poll_id": poll_id,
+            "results": await crud.get_poll_results_async(db, poll_id),
+        }
+        await connection_manager.broadcast_to_poll(
+            poll_id, C.ACTION_UPDATE, response_data
+        )
 
 
 @router.post("/{poll_id}/vote")
-async def vote(poll_id: str, vote: schemas.VoteCreate, db: Session = Depends(get_db)):
-    """Cast a vote for a choice in a poll. Broadcasts update to subscribers."""
-    poll = crud.get_poll(db, poll_id)
-    if not poll:
+async def vote(
+    poll_id: str, vote: schemas.VoteCreate, db: AsyncSession = Depends(get_async_db)
+):
+    """Cast a vote for a choice in a poll. Broadcasts update to subscribers.
+
+    In write-behind mode the vote is committed together with concurrent ones
+    and answered once that group is committed.
+    """
+    # Known closed polls are turned away without touching the database
+    if poll_closer.is_closed(poll_id):
+        raise HTTPException(status_code=400, detail=crud.POLL_CLOSED)
+    if vote_writer.running:
+        outcome = await vote_writer.submit(poll_id, vote)
+        if outcome["status"] != "ok":
+            status_code = 404 if outcome["detail"] == crud.POLL_NOT_FOUND else 400
+            raise HTTPException(status_code=status_code, detail=outcome["detail"])
+        return {"status": "ok"}
+
+    try:
+        await crud.create_vote_async(db, poll_id, vote)
+    except crud.PollNotFoundError:
         raise HTTPException(status_code=404, detail="Poll not found")
-    if not any(c.id == vote.choice_id for c in poll.choices):
+    except crud.InvalidChoiceError:
         raise HTTPException(status_code=400, detail="Invalid choice")
-    if crud.has_user_voted(db, poll_id, vote.username):
+    except crud.PollClosedError:
+        raise HTTPException(status_code=400, detail=crud.POLL_CLOSED)
+    except crud.DuplicateVoteError:
         raise HTTPException(
             status_code=400, detail="User has already voted in this poll"
         )
 
-    crud.create_vote(db, vote)
-
     # Broadcast update to WebSocket subscribers
-    response_data: dict[str, Any] = {
-        "poll_id": poll_id,
-        "results": crud.get_poll_results(db, poll_id),
-    }
-    await connection_manager.broadcast_to_poll(poll_id, C.ACTION_UPDATE, response_data)
+    await publish_results(db, poll_id)
 
     return {"status": "ok"}
+
+
+async def read_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Parse a streamed NDJSON body line by line, None for invalid lines."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield parse_line(line)
+    if buffer.strip():
+        yield parse_line(buffer)
+
+
+async def iter_rows(rows: list[Any]) -> AsyncIterator[Any]:
+    for row in rows:
+        yield row
+
+
+def parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def to_vote(row: Any) -> Optional[schemas.VoteCreate]:
+    try:
+        return schemas.VoteCreate.model_validate(row)
+    except ValidationError:
+        return None
+
+
+@router.post("/{poll_id}/votes:batch")
+async def vote_batch(
+    poll_id: str, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cast many votes for a poll, sent as a JSON array or streamed as NDJSON.
+    Votes are committed in chunks, each followed by one broadcast, and every
+    vote gets an outcome, in the order they were sent.
+    """
+    if poll_closer.is_closed(poll_id):
+        raise HTTPException(status_code=400, detail=crud.POLL_CLOSED)
+    if not await crud.poll_exists_async(db, poll_id):
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    outcomes: list[Optional[dict[str, Any]]] = []
+    # Outcome slots and votes of the chunk being collected
+    pending: list[tuple[int, schemas.VoteCreate]] = []
+
+    async def flush() -> None:
+        results = await crud.create_votes_async(db, poll_id, [v for _, v in pending])
+        for (slot, _), outcome in zip(pending, results):
+            outcomes[slot] = outcome
+        pending.clear()
+        if any(outcome["status"] == "ok" for outcome in results):
+            await publish_results(db, poll_id)
+
+    if request.headers.get("content-type", "").startswith(NDJSON):
+        rows: Any = read_ndjson(request)
+    else:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a list of votes")
+        rows = iter_rows(body)
+
+    async for row in rows:
+        vote = to_vote(row)
+        if vote is None:
+            outcomes.append({"status": "error", "detail": "Invalid vote"})
+            continue
+        pending.append((len(outcomes), vote))
+        outcomes.append(None)
+        if len(pending) >= VOTE_BATCH_CHUNK_SIZE:
+            await flush()
+    if pending:
+        await flush()
+
+    accepted = sum(1 for outcome in outcomes if outcome and outcome["status"] == "ok")
+    return {
+        "accepted": accepted,
+        "rejected": len(outcomes) - accepted,
+        "results": outcomes,
+    }
@@ -1,47 +1,61 @@
-import json
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from polling_app import constants as C
 from polling_app.utils.connection_manager import connection_manager
-from polling_app.utils.ws_helpers import send_error
-
-from ..database import SessionLocal
+from polling_app.utils.poll_closer import poll_closer
+from polling_app.utils.poll_purger import poll_purger
+from polling_app.utils.response_cache import response_cache
+from polling_app.utils.single_flight import http_reads
+from polling_app.utils.vote_writer import vote_writer
 
 router = APIRouter(prefix="/polls", tags=["websockets"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 async def cleanup_poll_connections(poll_id: str):
     """Clean up all WebSocket connections for a deleted poll."""
     await connection_manager.cleanup_poll(poll_id)
 
 
+def _is_id_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
 @router.websocket("/ws")
-async def websocket_subscribe_multi_poll(ws: WebSocket, db: Session = Depends(get_db)):
+async def websocket_subscribe_multi_poll(
+    ws: WebSocket, mode: str = C.MODE_FULL, heartbeat: bool = False
+):
     """
     WebSocket endpoint to subscribe to multiple polls' live updates.
-    Client can send JSON messages with actions: subscribe, unsubscribe, disconnect.
+    Client can send JSON messages with actions: subscribe, subscribe_many,
+    unsubscribe, disconnect.
+    With ?mode=delta a subscribe may carry the epoch and last_seq it last saw.
+    With ?heartbeat=1 the client promises to answer pings.
     """
-    await connection_manager.connect(ws)
+    await connection_manager.connect(
+        ws, delta=mode == C.MODE_DELTA, answers_pings=heartbeat
+    )
 
     try:
         while True:
-            msg = await ws.receive_text()
-            data = json.loads(msg)
+            data = await connection_manager.receive(ws)
             action = data.get("action")
             poll_id = data.get("poll_id")
 
             if action == C.ACTION_SUBSCRIBE and poll_id:
-                await connection_manager.subscribe_to_poll(ws, poll_id, db)
+                last_seq = data.get("last_seq")
+                if isinstance(last_seq, bool) or not isinstance(last_seq, int):
+                    # Not a resume: the client gets the full results
+                    last_seq = None
+                await connection_manager.subscribe_to_poll(
+                    ws, poll_id, last_seq=last_seq, epoch=data.get("epoch")
+                )
+
+            elif action == C.ACTION_SUBSCRIBE_MANY and _is_id_list(
+                data.get("poll_ids")
+            ):
+                await connection_manager.subscribe_to_polls(ws, data["poll_ids"])
 
             elif action == C.ACTION_UNSUBSCRIBE and poll_id:
                 await connection_manager.unsubscribe_from_poll(ws, poll_id)
@@ -50,43 +64,85 @@ async def websocket_subscribe_multi_poll(ws: WebSocket, db: Session = Depends(ge
                 await connection_manager.disconnect(ws)
                 break
 
+            elif action == C.ACTION_PONG:
+                # Already recorded by receive()
+                pass
+
             else:
-                await send_error(ws, C.ERR_UNKNOWN_ACTION, f"Unknown action {action}")
+                connection_manager.send_error(
+                    ws, C.ERR_UNKNOWN_ACTION, f"Unknown action {action}"
+                )
 
     except WebSocketDisconnect:
-        await connection_manager.disconnect(ws)
+        pass
     except Exception as e:
-        await send_error(ws, C.ERR_INTERNAL, str(e))
+        connection_manager.send_error(ws, C.ERR_INTERNAL, str(e))
         await connection_manager.disconnect(ws)
+    finally:
+        # Also covers handlers cancelled without a disconnect message
+        connection_manager.remove(ws)
 
 
 @router.websocket("/ws/{poll_id}")
 async def websocket_subscribe_one_poll(
-    ws: WebSocket, poll_id: str, db: Session = Depends(get_db)
+    ws: WebSocket,
+    poll_id: str,
+    mode: str = C.MODE_FULL,
+    epoch: Optional[str] = None,
+    last_seq: Optional[int] = None,
+    heartbeat: bool = False,
 ):
-    """WebSocket endpoint to subscribe to a single poll's live updates."""
-    await connection_manager.connect(ws)
+    """WebSocket endpoint to subscribe to a single poll's live updates.
+
+    With ?mode=delta, reconnecting with ?epoch=...&last_seq=... resumes the
+    update sequence instead of resending the full results. With ?heartbeat=1
+    the client promises to answer pings.
+    """
+    await connection_manager.connect(
+        ws, delta=mode == C.MODE_DELTA, answers_pings=heartbeat
+    )
 
     # Automatically subscribe to the specified poll
-    success = await connection_manager.subscribe_to_poll(ws, poll_id, db)
+    success = await connection_manager.subscribe_to_poll(
+        ws, poll_id, last_seq=last_seq, epoch=epoch
+    )
     if not success:
         await connection_manager.disconnect(ws)
         return
 
     try:
+        # Keep connection alive, ignore any messages but pongs
         while True:
-            # Keep connection alive, ignore any messages
-            await ws.receive_text()
+            try:
+                await connection_manager.receive(ws)
+            except WebSocketDisconnect:
+                raise
+            except Exception:
+                # Undecodable messages are ignored as before
+                pass
     except WebSocketDisconnect:
-        await connection_manager.disconnect(ws)
+        pass
+    finally:
+        connection_manager.remove(ws)
 
 
 @router.get("/stats")
 def get_websocket_stats():
-    """Get WebSocket connection statistics."""
+    """Get connection, shared read, response cache and background task statistics."""
     return {
         "total_connections": connection_manager.get_total_connections(),
         "active_polls": len(connection_manager._connections),
+        "evicted_connections": connection_manager.evicted,
+        "reaped_connections": connection_manager.reaped,
+        "collapsed_reads": {
+            "websocket": connection_manager.reads.collapsed,
+            "http": http_reads.collapsed,
+        },
+        "response_cache": response_cache.stats(),
+        "vote_group_commits": vote_writer.commits,
+        "purged_votes": poll_purger.purged,
+        "closed_polls": poll_closer.closed,
+        "archived_polls": poll_closer.archived,
     }
 
 
@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -11,6 +12,7 @@ class PollCreate(BaseModel):
     title: str
     question: str
     choices: List[ChoiceCreate]
+    closes_at: Optional[datetime] = None
 
 
 class ChoiceOut(BaseModel):
@@ -24,6 +26,7 @@ class PollOut(BaseModel):
     title: str
     question: str
     choices: List[ChoiceOut]
+    closes_at: Optional[datetime] = None
 
 
 class VoteCreate(BaseModel):
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Union
+from urllib.parse import unquote, urlparse
+
+# Where broadcasts are published so every app process can fan them out to
+# its own sockets. Empty keeps them inside this process.
+BROADCAST_BACKPLANE_URL = os.getenv("BROADCAST_BACKPLANE_URL", "")
+BROADCAST_BACKPLANE_CHANNEL = os.getenv(
+    "BROADCAST_BACKPLANE_CHANNEL", "polling_app:broadcast"
+)
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class Backplane:
+    """Pub/sub bus carrying broadcasts between app processes.
+
+    Every message published by any process is delivered to the handler of
+    every process, including the publisher.
+    """
+
+    # Whether other processes may be listening
+    distributed = False
+
+    def __init__(self):
+        self._handler: Optional[Handler] = None
+
+    def set_handler(self, handler: Handler) -> None:
+        self._handler = handler
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+
+class InProcessBackplane(Backplane):
+    """Delivers messages straight to the local handler."""
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        if self._handler is not None:
+            await self._handler(message)
+
+
+RespValue = Union[None, int, bytes, List[Any]]
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args: Union[str, bytes]) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> RespValue:
+    """Read one RESP reply."""
+    line = await reader.readuntil(b"\r\n")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body
+    if kind == b"-":
+        raise RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+class RedisBackplane(Backplane):
+    """Backplane over Redis PUBLISH/SUBSCRIBE, speaking RESP directly.
+
+    Uses one connection subscribed to the channel and one for publishing.
+    The subscriber reconnects on its own if the broker goes away; messages
+    published meanwhile are lost, as with any Redis pub/sub client.
+    """
+
+    distributed = True
+
+    def __init__(
+        self,
+        url: str,
+        channel: str = BROADCAST_BACKPLANE_CHANNEL,
+        reconnect_delay: float = 1.0,
+    ):
+        super().__init__()
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._publisher: Optional[tuple] = None
+        self._publish_lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    async def _open(self) -> tuple:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(encode_command("AUTH", self.password))
+            await read_reply(reader)
+        return reader, writer
+
+    async def start(self, timeout: float = 5.0) -> None:
+        self._listener = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout)
+        except asyncio.TimeoutError:
+            # Keep serving local sockets, the listener retries in the background
+            pass
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._publisher is not None:
+            self._publisher[1].close()
+            self._publisher = None
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        payload = json.dumps(message)
+        async with self._publish_lock:
+            try:
+                if self._publisher is None:
+                    self._publisher = await self._open()
+                reader, writer = self._publisher
+                writer.write(encode_command("PUBLISH", self.channel, payload))
+                await writer.drain()
+                await read_reply(reader)
+            except (OSError, asyncio.IncompleteReadError):
+                # Reconnect on the next publish
+                self._publisher = None
+                raise
+
+    async def _dispatch(self, payload: bytes) -> None:
+        if self._handler is None:
+            return
+        try:
+            await self._handler(json.loads(payload))
+        except Exception:
+            # A bad message must not take the subscription down
+            pass
+
+    async def _listen(self) -> None:
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._open()
+                writer.write(encode_command("SUBSCRIBE", self.channel))
+                await writer.drain()
+                await read_reply(reader)
+                self._subscribed.set()
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and reply[0] == b"message":
+                        await self._dispatch(reply[2])
+            except (OSError, asyncio.IncompleteReadError, RespError):
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+
+def create_backplane(url: str = BROADCAST_BACKPLANE_URL) -> Backplane:
+    """Build the backplane configured by a URL, in-process when empty."""
+    if not url:
+        return InProcessBackplane()
+    scheme = urlparse(url).scheme
+    if scheme in ("redis", "tcp"):
+        return RedisBackplane(url)
+    raise ValueError(f"Unsupported backplane URL {url}")
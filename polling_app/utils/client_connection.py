@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from polling_app.utils.codecs import DEFAULT_CODEC, Codec, Frame
+from polling_app.utils.ws_helpers import send_frame
+
+# What to do with a message for a client whose send queue is full
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_CONFLATE = "conflate"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_CONFLATE, OVERFLOW_DISCONNECT)
+
+# Messages buffered per connection before the overflow policy kicks in
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+SEND_QUEUE_OVERFLOW = os.getenv("WS_SEND_QUEUE_OVERFLOW", OVERFLOW_CONFLATE)
+
+
+class ClientConnection:
+    """Registry record of one WebSocket and its bounded outgoing queue.
+
+    Broadcasts only enqueue, so a slow client delays nobody but itself. When
+    the queue is full the overflow policy drops the oldest message, conflates
+    the new message with a queued one for the same poll (each update is a
+    full snapshot, so the latest supersedes the rest) or gives up on the
+    client. A failed write reports the client through on_failure.
+
+    Records are hashed by identity and kept in per-poll sets, so subscribing
+    and unsubscribing are O(1). With ``__slots__`` the registry holds about
+    3.2 KB per idle connection subscribed to one poll, most of it the writer
+    task; see benchmarks/bench_registry.py.
+    """
+
+    __slots__ = (
+        "websocket",
+        "polls",
+        "delta",
+        "codec",
+        "last_seen",
+        "heartbeat",
+        "missed",
+        "max_queue",
+        "overflow",
+        "dropped",
+        "_on_failure",
+        "_queue",
+        "_ready",
+        "_writer",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_failure: Callable[["ClientConnection"], None],
+        max_queue: int = SEND_QUEUE_SIZE,
+        overflow: str = SEND_QUEUE_OVERFLOW,
+        delta: bool = False,
+        codec: Codec = DEFAULT_CODEC,
+        heartbeat: bool = True,
+        answers_pings: bool = False,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow}")
+        self.websocket = websocket
+        # Poll IDs this connection is subscribed to
+        self.polls: Set[str] = set()
+        # Whether updates are sent as sequence-numbered deltas
+        self.delta = delta
+        # Wire encoding negotiated through the subprotocol
+        self.codec = codec
+        # When the client last sent anything, None for sinks that never do
+        self.last_seen: Optional[float] = time.monotonic() if heartbeat else None
+        # Whether the client answers pings, and so can be held to them
+        self.heartbeat = answers_pings
+        # Pings sent since the client last sent anything
+        self.missed = 0
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.dropped = 0
+        self._on_failure = on_failure
+        # (conflation key, encoded message), None marking the end
+        self._queue: Deque[Tuple[Optional[str], Optional[Frame]]] = deque()
+        self._ready = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: Frame, key: Optional[str] = None) -> bool:
+        """Queue a message for the writer.
+
+        Returns False when the client overflowed under the disconnect policy
+        and should be evicted.
+        """
+        if len(self._queue) >= self.max_queue:
+            if self.overflow == OVERFLOW_DISCONNECT:
+                return False
+            if self.overflow == OVERFLOW_CONFLATE and key is not None:
+                self._drop(key)
+            else:
+                self._queue.popleft()
+            self.dropped += 1
+        self._queue.append((key, message))
+        self._ready.set()
+        return True
+
+    def _drop(self, key: str) -> None:
+        """Drop the queued message with the given key, else the oldest one."""
+        for i, (queued_key, _) in enumerate(self._queue):
+            if queued_key == key:
+                del self._queue[i]
+                return
+        self._queue.popleft()
+
+    def pending(self) -> int:
+        """Number of messages waiting to be written."""
+        return len(self._queue)
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self._queue:
+                    _, message = self._queue.popleft()
+                    if message is None:
+                        # Queued by finish(): everything before it is sent
+                        return
+                    await send_frame(self.websocket, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._on_failure(self)
+
+    async def finish(self, timeout: float = 1.0) -> None:
+        """Send what is queued, then stop the writer.
+
+        Gives up and discards the rest if the client does not take it
+        within the timeout.
+        """
+        self._queue.append((None, None))
+        self._ready.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._writer), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the writer and discard whatever is still queued."""
+        self._writer.cancel()
+        self._queue.clear()
@@ -0,0 +1,120 @@
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional wire format
+    msgpack = None
+
+# Binary frames at least this large are deflated under msgpack+deflate
+WS_COMPRESS_MIN_BYTES = int(os.getenv("WS_COMPRESS_MIN_BYTES", "1024"))
+WS_COMPRESS_LEVEL = int(os.getenv("WS_COMPRESS_LEVEL", "6"))
+
+# An encoded message: text for JSON, bytes for binary codecs
+Frame = Union[str, bytes]
+
+# First byte of msgpack+deflate frames
+FLAG_RAW = 0
+FLAG_DEFLATE = 1
+
+
+class Codec:
+    """Wire encoding of the message envelope, chosen by WebSocket subprotocol."""
+
+    # Subprotocol name
+    name = ""
+    # Whether frames are sent as binary rather than text
+    binary = False
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        raise NotImplementedError
+
+    def decode(self, data: Frame) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """JSON text frames, encoded with orjson when it is installed."""
+
+    name = "json"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        if orjson is not None:
+            return orjson.dumps(message).decode()
+        return json.dumps(message)
+
+    def decode(self, data: Frame) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class MsgpackCodec(Codec):
+    """Binary msgpack frames."""
+
+    name = "msgpack"
+    binary = True
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        return msgpack.packb(message)
+
+    def decode(self, data: Frame) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        return msgpack.unpackb(data)
+
+
+class DeflateMsgpackCodec(MsgpackCodec):
+    """Msgpack frames behind a flag byte, deflated from min_bytes up.
+
+    Small frames are not worth compressing, so only large snapshots pay for
+    it. This works whatever the WebSocket server negotiates, unlike the
+    permessage-deflate extension.
+    """
+
+    name = "msgpack+deflate"
+
+    def __init__(
+        self, min_bytes: int = WS_COMPRESS_MIN_BYTES, level: int = WS_COMPRESS_LEVEL
+    ):
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        packed = msgpack.packb(message)
+        if len(packed) < self.min_bytes:
+            return bytes([FLAG_RAW]) + packed
+        return bytes([FLAG_DEFLATE]) + zlib.compress(packed, self.level)
+
+    def decode(self, data: Frame) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        body = data[1:]
+        if data[0] == FLAG_DEFLATE:
+            body = zlib.decompress(body)
+        return msgpack.unpackb(body)
+
+
+DEFAULT_CODEC: Codec = JsonCodec()
+
+# Codecs by subprotocol name, binary ones only when msgpack is installed
+CODECS: Dict[str, Codec] = {DEFAULT_CODEC.name: DEFAULT_CODEC}
+if msgpack is not None:
+    for codec in (MsgpackCodec(), DeflateMsgpackCodec()):
+        CODECS[codec.name] = codec
+
+
+def negotiate(offered: List[str]) -> Optional[Codec]:
+    """The first supported subprotocol the client offered, if any."""
+    for name in offered:
+        codec = CODECS.get(name)
+        if codec is not None:
+            return codec
+    return None
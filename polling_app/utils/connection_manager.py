@@ -1,157 +1,683 @@
 import asyncio
-from typing import Dict, List, Set
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 
-from fastapi import WebSocket
-from sqlalchemy.orm import Session
+from fastapi import WebSocket, WebSocketDisconnect
 
 from polling_app import constants as C
-from polling_app.utils.ws_helpers import send_error, send_success
+from polling_app.utils.backplane import Backplane, create_backplane
+from polling_app.utils.client_connection import ClientConnection
+from polling_app.utils.codecs import DEFAULT_CODEC, Codec, Frame, negotiate
+from polling_app.utils.poll_stream import DELTA_STREAM_POLLS, PollStream
+from polling_app.utils.single_flight import SingleFlight
+from polling_app.utils.tally_cache import tally_cache
+from polling_app.utils.ws_helpers import error_frame, send_frame, success_frame
 
-from .. import crud, models
-from ..database import SessionLocal
+from .. import crud
+from ..database import AsyncSessionLocal
+
+# Milliseconds between coalesced result broadcasts, 0 broadcasts every vote
+BROADCAST_COALESCE_MS = int(os.getenv("BROADCAST_COALESCE_MS", "0"))
+
+# Seconds of client silence before it is pinged, 0 disables heartbeats
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "20"))
+# Unanswered pings after which a client that answers pings is reaped
+WS_HEARTBEAT_MISSED = int(os.getenv("WS_HEARTBEAT_MISSED", "3"))
+
+# Backplane message kinds
+OP_BROADCAST = "broadcast"
+OP_CLEANUP = "cleanup"
 
 
 class ConnectionManager:
-    """Manages WebSocket connections for real-time poll updates."""
+    """Manages WebSocket connections for real-time poll updates.
+
+    Broadcasts and poll cleanups go through the backplane, so with several
+    workers or nodes each one fans out to its own sockets.
+    """
 
-    def __init__(self):
-        # Maps poll_id to list of WebSocket connections
-        self._connections: Dict[str, List[WebSocket]] = {}
-        # Maps WebSocket to set of subscribed poll_ids for cleanup
-        self._subscriptions: Dict[WebSocket, Set[str]] = {}
+    def __init__(
+        self,
+        coalesce_ms: int = BROADCAST_COALESCE_MS,
+        backplane: Optional[Backplane] = None,
+        heartbeat_interval: float = WS_HEARTBEAT_INTERVAL,
+        max_missed: int = WS_HEARTBEAT_MISSED,
+    ):
+        self.coalesce_ms = coalesce_ms
+        self.heartbeat_interval = heartbeat_interval
+        self.max_missed = max_missed
+        self.node_id = str(uuid.uuid4())
+        self.backplane = backplane or create_backplane()
+        self.backplane.set_handler(self._on_backplane_message)
+        # Polls with votes not yet broadcast, flushed once per tick
+        self._dirty: Set[str] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._reaper: Optional[asyncio.Task] = None
+        # Maps poll_id to the set of subscribed connections
+        self._connections: Dict[str, Set[ClientConnection]] = {}
+        # Maps WebSocket to its connection record, which also tracks the
+        # subscribed poll_ids for cleanup
+        self._clients: Dict[WebSocket, ClientConnection] = {}
+        # Maps poll_id to its delta sequence, for polls with delta subscribers.
+        # Sequence numbers are only meaningful within one stream, so snapshots
+        # carry the stream's epoch, which a resume has to match
+        self._streams: "OrderedDict[str, PollStream]" = OrderedDict()
+        # Sockets dropped because a write failed or their queue overflowed
+        self.evicted = 0
+        # Sockets dropped for not answering pings
+        self.reaped = 0
+        # Snapshot reads shared by concurrent subscribers
+        self.reads = SingleFlight()
 
-    def poll_exists(self, poll_id: str) -> bool:
-        """Check if a poll exists in the database."""
-        db: Session = SessionLocal()
+    @property
+    def coalescing(self) -> bool:
+        """Whether votes are batched into periodic broadcast ticks."""
+        return self._flusher is not None and not self._flusher.done()
+
+    async def start(self) -> None:
+        """Join the backplane and start the flush and heartbeat loops."""
+        await self.backplane.start()
+        if self.coalesce_ms > 0 and not self.coalescing:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self.heartbeat_interval > 0 and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop(self) -> None:
+        """Stop the loops, broadcast what is pending and leave the backplane."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+            await self.flush_dirty()
+        await self.backplane.stop()
+
+    def mark_dirty(self, poll_id: str) -> None:
+        """Record that a poll's results changed, to be broadcast next tick."""
+        self._dirty.add(poll_id)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.coalesce_ms / 1000)
+            try:
+                await self.flush_dirty()
+            except Exception:
+                # Keep ticking, flush_dirty() has put the polls back
+                pass
+
+    async def flush_dirty(self) -> None:
+        """Broadcast the results of every dirty poll that has subscribers.
+
+        All dirty polls are tallied with one read and each gets a single
+        broadcast, however many votes it received since the last tick.
+        """
+        dirty, self._dirty = self._dirty, set()
+        if self.backplane.distributed:
+            # Subscribers may be connected to other nodes
+            poll_ids = list(dirty)
+        else:
+            poll_ids = [poll_id for poll_id in dirty if poll_id in self._connections]
+        if not poll_ids:
+            return
         try:
-            return (
-                db.query(models.Poll).filter(models.Poll.id == poll_id).first()
-                is not None
-            )
-        finally:
-            db.close()
+            async with AsyncSessionLocal() as db:
+                results = await crud.get_results_for_polls_async(db, poll_ids)
+            for poll_id in poll_ids:
+                await self.broadcast_to_poll(
+                    poll_id,
+                    C.ACTION_UPDATE,
+                    {"poll_id": poll_id, "results": results[poll_id]},
+                )
+        except Exception:
+            # Retried next tick rather than leaving the final votes unsent
+            self._dirty.update(poll_ids)
+            raise
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            self.reap()
+
+    def reap(self, now: Optional[float] = None) -> int:
+        """Ping quiet clients and drop those that stopped answering.
+
+        Clients that opted into heartbeats when connecting, or have answered
+        a ping since, are reaped after max_missed pings go unanswered; clients
+        unaware of heartbeats are never reaped. Returns the number of clients
+        reaped.
+        """
+        now = time.monotonic() if now is None else now
+        ping = success_frame(C.ACTION_PING)
+        encoded: Dict[str, Frame] = {}
+        idle_clients, overflowed = [], []
+        for client in self._clients.values():
+            if client.last_seen is None:
+                continue
+            if client.heartbeat and 0 < self.max_missed <= client.missed:
+                idle_clients.append(client)
+            elif now - client.last_seen >= self.heartbeat_interval:
+                # Counted when queued, so pings conflated behind a dead
+                # socket still count as unanswered
+                client.missed += 1
+                if not client.enqueue(self._encode(client, ping, encoded), "ping"):
+                    overflowed.append(client)
+        # Evicted after the loop, as eviction changes the registry
+        for client in idle_clients + overflowed:
+            self._evict(client)
+        self.reaped += len(idle_clients)
+        return len(idle_clients)
+
+    def touch(self, websocket: WebSocket, pong: bool = False) -> None:
+        """Record that a client is alive, pong marking it heartbeat-aware."""
+        client = self._clients.get(websocket)
+        if client is not None and client.last_seen is not None:
+            client.last_seen = time.monotonic()
+            client.missed = 0
+            client.heartbeat = client.heartbeat or pong
+
+    async def poll_snapshot(
+        self, poll_id: str, since: int = 0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Current results of a poll, None when it does not exist.
 
-    async def connect(self, websocket: WebSocket) -> None:
-        """Accept a new WebSocket connection."""
-        await websocket.accept()
-        self._subscriptions[websocket] = set()
-        await send_success(websocket, C.ACTION_CONNECT, {"message": "connected"})
+        Read no earlier than flight since, in one query and one session, and
+        not at all when the tally is cached.
+        """
+        results = tally_cache.get(poll_id)
+        if results is not None:
+            return results
+        return await self.reads.do(
+            ("snapshot", poll_id),
+            lambda: self._read(crud.find_poll_results_async, poll_id),
+            since,
+        )
+
+    @staticmethod
+    async def _read(query: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        # Shared reads run in their own session, not in the caller's
+        async with AsyncSessionLocal() as db:
+            return await query(db, *args)
+
+    async def connect(
+        self, websocket: WebSocket, delta: bool = False, answers_pings: bool = False
+    ) -> None:
+        """Accept a new WebSocket connection, optionally in delta mode.
+
+        The wire encoding is the first subprotocol offered by the client that
+        has a codec, JSON when there is none. Clients that answers_pings are
+        held to heartbeats from the start, before their first pong.
+        """
+        codec = negotiate(websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol=codec.name if codec else None)
+        codec = codec or DEFAULT_CODEC
+        # Sent before the writer exists, later frames all go through it
+        await send_frame(
+            websocket,
+            codec.encode(success_frame(C.ACTION_CONNECT, {"message": "connected"})),
+        )
+        self.attach(
+            websocket,
+            delta=delta,
+            codec=codec,
+            heartbeat=True,
+            answers_pings=answers_pings,
+        )
+
+    def attach(
+        self,
+        sink: Any,
+        delta: bool = False,
+        codec: Codec = DEFAULT_CODEC,
+        heartbeat: bool = False,
+        answers_pings: bool = False,
+    ) -> None:
+        """Register a subscriber that is not a WebSocket, such as an event stream.
+
+        The sink only needs the send_text/send_bytes and close methods of a
+        WebSocket; it is then subscribed and removed like one.
+        """
+        self._clients[sink] = ClientConnection(
+            sink,
+            self._on_write_failure,
+            delta=delta,
+            codec=codec,
+            heartbeat=heartbeat,
+            answers_pings=answers_pings,
+        )
+
+    def codec_for(self, websocket: WebSocket) -> Codec:
+        """The wire encoding negotiated by a connected WebSocket."""
+        client = self._clients.get(websocket)
+        return client.codec if client is not None else DEFAULT_CODEC
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        """Receive one client message, decoded with its negotiated codec."""
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        self.touch(websocket)
+        data = message.get("bytes")
+        if data is None:
+            data = message["text"]
+        decoded = self.codec_for(websocket).decode(data)
+        if isinstance(decoded, dict) and decoded.get("action") == C.ACTION_PONG:
+            self.touch(websocket, pong=True)
+        return decoded
 
     async def disconnect(self, websocket: WebSocket) -> None:
         """Handle WebSocket disconnection and cleanup all subscriptions."""
-        if websocket in self._subscriptions:
-            subscribed_polls = self._subscriptions[websocket].copy()
-            for poll_id in subscribed_polls:
-                await self._unsubscribe_from_poll(websocket, poll_id)
-            del self._subscriptions[websocket]
-        await send_success(websocket, C.ACTION_DISCONNECT)
+        client = self._detach(websocket)
+        if client is not None:
+            # Flush what is queued, ending with the disconnect ack
+            client.enqueue(client.codec.encode(success_frame(C.ACTION_DISCONNECT)))
+            await client.finish()
         await websocket.close()
 
+    def remove(self, websocket: WebSocket) -> None:
+        """Forget a WebSocket that has gone away, with all its subscriptions."""
+        client = self._detach(websocket)
+        if client is not None:
+            client.close()
+
+    def _detach(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        """Unregister a WebSocket and all its subscriptions, returning its record."""
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return None
+        for poll_id in client.polls:
+            self._discard(client, poll_id)
+        client.polls.clear()
+        return client
+
+    def send_error(self, websocket: WebSocket, code: str, message: str) -> None:
+        """Queue an error frame behind whatever the WebSocket has pending."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            self._send(client, error_frame(code, message))
+
+    def _send_not_found(self, client: ClientConnection, poll_id: str) -> None:
+        self._send(
+            client,
+            error_frame(C.ERR_POLL_NOT_FOUND, f"Poll {poll_id} does not exist"),
+        )
+
+    def _discard(self, client: ClientConnection, poll_id: str) -> None:
+        subscribers = self._connections.get(poll_id)
+        if subscribers is not None:
+            subscribers.discard(client)
+            # Clean up empty poll connection sets
+            if not subscribers:
+                del self._connections[poll_id]
+
+    def _evict(self, client: ClientConnection) -> None:
+        """Drop an unresponsive or overflowing WebSocket and close it."""
+        if self._clients.get(client.websocket) is not client:
+            return
+        self.remove(client.websocket)
+        self.evicted += 1
+        asyncio.create_task(self._close_quietly(client.websocket))
+
+    def _on_write_failure(self, client: ClientConnection) -> None:
+        self._evict(client)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            # Already closed by the peer or the server
+            pass
+
     async def subscribe_to_poll(
-        self, websocket: WebSocket, poll_id: str, db: Session
+        self,
+        websocket: WebSocket,
+        poll_id: str,
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
     ) -> bool:
-        """Subscribe a WebSocket to a specific poll's updates."""
-        # Check if poll exists
-        if not self.poll_exists(poll_id):
-            await send_error(
-                websocket, C.ERR_POLL_NOT_FOUND, f"Poll {poll_id} does not exist"
-            )
+        """Subscribe a WebSocket to a specific poll's updates.
+
+        A delta-mode client resuming with the epoch and last_seq of its
+        previous session is sent only the changes it missed, when they are
+        still in the replay buffer, instead of the full results.
+
+        The snapshot, which also tells whether the poll exists, borrows one
+        database session only while it is read, and is shared with concurrent
+        subscribers of the same poll. It does not touch the database when the
+        tally is cached.
+        """
+        client = self._clients.get(websocket)
+        if client is None:
             return False
 
         # Check if already subscribed
-        if (
-            websocket in self._subscriptions
-            and poll_id in self._subscriptions[websocket]
-        ):
-            await send_error(
-                websocket, C.ERR_ALREADY_SUBSCRIBED, f"Already subscribed to {poll_id}"
+        if poll_id in client.polls:
+            self._send(
+                client,
+                error_frame(
+                    C.ERR_ALREADY_SUBSCRIBED, f"Already subscribed to {poll_id}"
+                ),
             )
             return False
 
-        # Add connection to poll
-        if poll_id not in self._connections:
-            self._connections[poll_id] = []
-        self._connections[poll_id].append(websocket)
-
-        # Track subscription for this websocket
-        if websocket not in self._subscriptions:
-            self._subscriptions[websocket] = set()
-        self._subscriptions[websocket].add(poll_id)
-
-        # Send current poll results
-        results = crud.get_poll_results(db, poll_id)
-        await send_success(
-            websocket, C.ACTION_SUBSCRIBE, {"poll_id": poll_id, "results": results}
+        if client.delta:
+            return await self._subscribe_delta(
+                client, poll_id, self.reads.mark(), last_seq, epoch
+            )
+
+        # Add connection to poll and track the subscription on it. Registered
+        # before the results are read, so a vote is either in them or
+        # broadcast after
+        self._connections.setdefault(poll_id, set()).add(client)
+        client.polls.add(poll_id)
+        results = await self.poll_snapshot(poll_id, self.reads.mark())
+        if results is None:
+            client.polls.discard(poll_id)
+            self._discard(client, poll_id)
+            self._send_not_found(client, poll_id)
+            return False
+
+        # Send current poll results, queued behind any update already sent.
+        # Unkeyed, so conflating a later update never replaces the ack
+        self._send(
+            client,
+            success_frame(C.ACTION_SUBSCRIBE, {"poll_id": poll_id, "results": results}),
         )
         return True
 
+    async def _subscribe_delta(
+        self,
+        client: ClientConnection,
+        poll_id: str,
+        since: int,
+        last_seq: Optional[int],
+        epoch: Optional[str],
+    ) -> bool:
+        """Subscribe a delta-mode client, resuming its sequence when possible.
+
+        The snapshot is taken from the poll's stream in the same step as the
+        subscription is registered, so every later delta follows it.
+        """
+        results = await self.poll_snapshot(poll_id, since)
+        if results is None:
+            self._send_not_found(client, poll_id)
+            return False
+        data = self._register_delta(client, poll_id, results, last_seq, epoch)
+        if data is None:
+            return False
+        self._send(client, success_frame(C.ACTION_SUBSCRIBE, data))
+        return True
+
+    def _register_delta(
+        self,
+        client: ClientConnection,
+        poll_id: str,
+        results: List[Dict[str, Any]],
+        last_seq: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Register a delta subscription, returning the data of its ack."""
+        if client.websocket not in self._clients or poll_id in client.polls:
+            # Went away or subscribed concurrently while the results loaded
+            return None
+
+        stream = self._streams.get(poll_id)
+        if stream is None:
+            stream = self._streams[poll_id] = PollStream(results)
+            self._trim_streams()
+        else:
+            self._streams.move_to_end(poll_id)
+            if poll_id not in self._connections and stream.diff(results):
+                # Nothing was broadcast here while the poll had no local
+                # subscribers: record the missed votes as the next delta
+                self._broadcast_local(
+                    poll_id, C.ACTION_UPDATE, {"poll_id": poll_id, "results": results}
+                )
+
+        data: Dict[str, Any] = {"poll_id": poll_id, "epoch": stream.epoch}
+        changes = None
+        if last_seq is not None and epoch == stream.epoch:
+            changes = stream.changes_since(last_seq)
+        if changes is None:
+            data["results"] = stream.results
+        else:
+            data["changes"] = changes
+        data["seq"] = stream.seq
+
+        self._connections.setdefault(poll_id, set()).add(client)
+        client.polls.add(poll_id)
+        return data
+
+    async def subscribe_to_polls(
+        self, websocket: WebSocket, poll_ids: List[str]
+    ) -> List[str]:
+        """Subscribe a WebSocket to many polls with a single reply.
+
+        Existence is checked with one query and the results are loaded with
+        one grouped query. The reply lists the subscribed polls with their
+        results, and an error for each poll that could not be subscribed.
+        Returns the IDs of the subscribed polls.
+        """
+        client = self._clients.get(websocket)
+        if client is None:
+            return []
+        # Duplicates are dropped, the order is kept
+        requested = list(dict.fromkeys(poll_ids))
+        async with AsyncSessionLocal() as db:
+            uncached = [p for p in requested if tally_cache.get(p) is None]
+            existing = set(requested).difference(uncached)
+            if uncached:
+                existing |= await crud.get_existing_poll_ids_async(db, uncached)
+            if websocket not in self._clients:
+                return []
+
+            errors, subscribing = [], []
+            for poll_id in requested:
+                if poll_id not in existing:
+                    error = error_frame(
+                        C.ERR_POLL_NOT_FOUND, f"Poll {poll_id} does not exist"
+                    )
+                elif poll_id in client.polls:
+                    error = error_frame(
+                        C.ERR_ALREADY_SUBSCRIBED, f"Already subscribed to {poll_id}"
+                    )
+                else:
+                    subscribing.append(poll_id)
+                    continue
+                errors.append({"poll_id": poll_id, **error})
+
+            if not client.delta:
+                # Registered before the read, as for a single subscribe
+                for poll_id in subscribing:
+                    self._connections.setdefault(poll_id, set()).add(client)
+                    client.polls.add(poll_id)
+            results = {}
+            if subscribing:
+                results = await crud.get_results_for_polls_async(db, subscribing)
+
+        polls = []
+        for poll_id in subscribing:
+            if client.delta:
+                data = self._register_delta(client, poll_id, results[poll_id])
+                if data is None:
+                    continue
+            else:
+                data = {"poll_id": poll_id, "results": results[poll_id]}
+            polls.append(data)
+        self._send(
+            client,
+            success_frame(C.ACTION_SUBSCRIBE_MANY, {"polls": polls, "errors": errors}),
+        )
+        return [data["poll_id"] for data in polls]
+
+    def _trim_streams(self) -> None:
+        """Drop the least recently used streams beyond DELTA_STREAM_POLLS.
+
+        Streams still feeding local delta subscribers are kept, so those
+        clients never lose their sequence, as is the newest one, about to get
+        its first subscriber.
+        """
+        excess = len(self._streams) - DELTA_STREAM_POLLS
+        if excess <= 0:
+            return
+        for poll_id in list(self._streams)[:-1]:
+            subscribers = self._connections.get(poll_id, ())
+            if not any(client.delta for client in subscribers):
+                del self._streams[poll_id]
+                excess -= 1
+                if not excess:
+                    return
+
     async def unsubscribe_from_poll(self, websocket: WebSocket, poll_id: str) -> bool:
         """Unsubscribe a WebSocket from a specific poll's updates."""
-        if (
-            websocket not in self._subscriptions
-            or poll_id not in self._subscriptions[websocket]
-        ):
-            await send_error(
-                websocket, C.ERR_NOT_SUBSCRIBED, f"Not subscribed to {poll_id}"
+        client = self._clients.get(websocket)
+        if client is None:
+            return False
+        if poll_id not in client.polls:
+            self._send(
+                client,
+                error_frame(C.ERR_NOT_SUBSCRIBED, f"Not subscribed to {poll_id}"),
             )
             return False
 
-        await self._unsubscribe_from_poll(websocket, poll_id)
-        await send_success(websocket, C.ACTION_UNSUBSCRIBE, {"poll_id": poll_id})
+        client.polls.discard(poll_id)
+        self._discard(client, poll_id)
+        # Queued behind any update already on its way for the poll
+        self._send(client, success_frame(C.ACTION_UNSUBSCRIBE, {"poll_id": poll_id}))
         return True
 
-    async def _unsubscribe_from_poll(self, websocket: WebSocket, poll_id: str) -> None:
-        """Internal method to unsubscribe without sending response."""
-        # Remove from connections
-        if poll_id in self._connections and websocket in self._connections[poll_id]:
-            self._connections[poll_id].remove(websocket)
-            # Clean up empty poll connection lists
-            if not self._connections[poll_id]:
-                del self._connections[poll_id]
-
-        # Remove from subscriptions
-        if websocket in self._subscriptions:
-            self._subscriptions[websocket].discard(poll_id)
+    def _send(
+        self,
+        client: ClientConnection,
+        message: Dict[str, Any],
+        key: Optional[str] = None,
+    ) -> None:
+        """Queue a message on a connection's writer, evicting it on overflow."""
+        if not client.enqueue(client.codec.encode(message), key):
+            self._evict(client)
 
     async def broadcast_to_poll(self, poll_id: str, action: str, data: dict) -> None:
-        """Broadcast a message to all subscribers of a specific poll."""
-        if poll_id not in self._connections:
+        """Broadcast a message to all subscribers of a poll, on every node."""
+        if not self.backplane.distributed and poll_id not in self._connections:
             return
-
-        # Create tasks for all broadcasts to avoid blocking
-        tasks = []
-        for websocket in self._connections[
-            poll_id
-        ].copy():  # Copy to avoid modification during iteration
-            task = asyncio.create_task(send_success(websocket, action, data))
-            tasks.append(task)
-
-        # Wait for all broadcasts to complete (optional, for error handling)
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        await self._publish(
+            {
+                "op": OP_BROADCAST,
+                "node": self.node_id,
+                "poll_id": poll_id,
+                "action": action,
+                "data": data,
+            }
+        )
 
     async def cleanup_poll(self, poll_id: str) -> None:
         """Clean up all connections for a deleted poll and notify subscribers."""
-        if poll_id not in self._connections:
-            return
+        await self._publish(
+            {"op": OP_CLEANUP, "node": self.node_id, "poll_id": poll_id}
+        )
 
-        websockets = self._connections[poll_id].copy()
+    async def _publish(self, message: Dict[str, Any]) -> None:
+        try:
+            await self.backplane.publish(message)
+        except Exception:
+            # Backplane unreachable: at least serve this node's sockets
+            await self._on_backplane_message(message)
 
-        # Notify all subscribers that the poll was deleted
-        for websocket in websockets:
-            try:
-                await send_error(
-                    websocket, C.ERR_POLL_DELETED, f"Poll {poll_id} has been deleted"
+    async def _on_backplane_message(self, message: Dict[str, Any]) -> None:
+        poll_id = message["poll_id"]
+        if message["op"] == OP_BROADCAST:
+            if message["node"] != self.node_id:
+                # Another node counted a vote this node's cache has not seen
+                tally_cache.invalidate(poll_id)
+            self._broadcast_local(poll_id, message["action"], message["data"])
+        elif message["op"] == OP_CLEANUP:
+            self._cleanup_local(poll_id)
+
+    def _broadcast_local(self, poll_id: str, action: str, data: dict) -> None:
+        """Queue a message for this node's subscribers of a poll.
+
+        The message is serialized once per codec in use and queued on every
+        subscriber's writer, so this never waits on socket I/O. Result
+        updates also advance the poll's delta sequence; delta-mode
+        subscribers get only the changed counts, and nothing when no count
+        changed.
+        """
+        delta = None
+        stream = self._streams.get(poll_id)
+        if stream is not None and action == C.ACTION_UPDATE:
+            changes = stream.advance(data["results"])
+            if changes:
+                delta = success_frame(
+                    C.ACTION_DELTA,
+                    {
+                        "poll_id": poll_id,
+                        "epoch": stream.epoch,
+                        "seq": stream.seq,
+                        "changes": changes,
+                    },
                 )
-                # Remove from subscriptions
-                if websocket in self._subscriptions:
-                    self._subscriptions[websocket].discard(poll_id)
-            except Exception:
-                # WebSocket might be closed, ignore errors
-                pass
 
-        # Remove all connections for this poll
-        del self._connections[poll_id]
+        subscribers = self._connections.get(poll_id)
+        if not subscribers:
+            return
+
+        message = success_frame(action, data)
+        encoded: Dict[str, Frame] = {}
+        encoded_delta: Dict[str, Frame] = {}
+        overflowed = []
+        for client in subscribers:
+            if client.delta and stream is not None and action == C.ACTION_UPDATE:
+                # A lost delta shows up as a gap in seq, the client resumes
+                if delta is not None and not client.enqueue(
+                    self._encode(client, delta, encoded_delta)
+                ):
+                    overflowed.append(client)
+            elif not client.enqueue(self._encode(client, message, encoded), poll_id):
+                overflowed.append(client)
+        # Evicted after the loop, as eviction changes the set
+        for client in overflowed:
+            self._evict(client)
+
+    @staticmethod
+    def _encode(
+        client: ClientConnection, message: Dict[str, Any], encoded: Dict[str, Frame]
+    ) -> Frame:
+        """Encode a message with the client's codec, reusing earlier encodings."""
+        frame = encoded.get(client.codec.name)
+        if frame is None:
+            frame = encoded[client.codec.name] = client.codec.encode(message)
+        return frame
+
+    def _cleanup_local(self, poll_id: str) -> None:
+        """Unsubscribe this node's sockets from a deleted poll and notify them."""
+        tally_cache.invalidate(poll_id)
+        self._streams.pop(poll_id, None)
+        if poll_id not in self._connections:
+            return
+
+        subscribers = self._connections.pop(poll_id)
+
+        # Notify all subscribers that the poll was deleted. Each writer sends
+        # on its own, so notification is concurrent and bounded by the queues
+        message = error_frame(C.ERR_POLL_DELETED, f"Poll {poll_id} has been deleted")
+        encoded: Dict[str, Frame] = {}
+        for client in subscribers:
+            # Remove from subscriptions
+            client.polls.discard(poll_id)
+            if not client.enqueue(self._encode(client, message, encoded)):
+                self._evict(client)
 
     def get_connection_count(self, poll_id: str) -> int:
         """Get the number of active connections for a poll."""
@@ -159,11 +685,12 @@ class ConnectionManager:
 
     def get_total_connections(self) -> int:
         """Get the total number of active WebSocket connections."""
-        return len(self._subscriptions)
+        return len(self._clients)
 
     def get_subscribed_polls(self, websocket: WebSocket) -> Set[str]:
         """Get the set of poll IDs a WebSocket is subscribed to."""
-        return self._subscriptions.get(websocket, set()).copy()
+        client = self._clients.get(websocket)
+        return set(client.polls) if client is not None else set()
 
 
 # Global connection manager instance
@@ -0,0 +1,27 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+
+def poll_etag(poll_id: str, version: int) -> str:
+    """Strong ETag of a poll's representation at a version."""
+    return f'"{poll_id}.{version}"'
+
+
+def collection_etag(versions: Iterable[Tuple[str, int]]) -> str:
+    """Strong ETag of the poll list, changing when any poll is added,
+    deleted or voted on."""
+    digest = hashlib.sha1()
+    for poll_id, version in sorted(versions):
+        digest.update(f"{poll_id}.{version};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists the ETag (or is ``*``)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    return "*" in candidates or any(
+        tag.removeprefix("W/") == etag for tag in candidates
+    )
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from polling_app import constants as C
+from polling_app.utils.codecs import Codec, Frame
+
+# Seconds without events before a comment is sent to keep proxies from
+# closing the connection
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+class EventStreamCodec(Codec):
+    """Formats envelopes as Server-Sent Events.
+
+    The event name is the action, or the error code for errors, and frames
+    carrying a delta sequence get ``id: <epoch>:<seq>`` so that the browser
+    resumes from there through Last-Event-ID.
+    """
+
+    name = "sse"
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        data = message.get("data") or {}
+        lines = []
+        if "epoch" in data and "seq" in data:
+            lines.append(f"id: {data['epoch']}:{data['seq']}")
+        if message["type"] == C.TYPE_ERROR:
+            lines.append(f"event: {message['code']}")
+        else:
+            lines.append(f"event: {message['action']}")
+        lines.append(f"data: {json.dumps(message)}")
+        return "\n".join(lines) + "\n\n"
+
+    def decode(self, data: Frame) -> Any:
+        raise NotImplementedError("event streams are read-only")
+
+
+EVENT_STREAM_CODEC = EventStreamCodec()
+
+
+def parse_last_event_id(
+    last_event_id: Optional[str],
+) -> Tuple[Optional[str], Optional[int]]:
+    """Split a Last-Event-ID into the epoch and seq to resume from."""
+    if not last_event_id:
+        return None, None
+    epoch, _, seq = last_event_id.rpartition(":")
+    if not epoch or not seq.isdigit():
+        return None, None
+    return epoch, int(seq)
+
+
+class EventStream:
+    """Subscriber sink feeding one Server-Sent Events response.
+
+    Registered with the ConnectionManager in place of a WebSocket, so its
+    connection record queues and conflates events as for any socket. Each
+    event is handed over once the response has taken the previous one.
+    """
+
+    def __init__(self):
+        self._events: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=1)
+        self.closed = False
+
+    async def send_text(self, event: str) -> None:
+        if self.closed:
+            raise RuntimeError("Event stream closed")
+        await self._events.put(event)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+        if self._events.empty():
+            self._events.put_nowait(None)
+
+    async def events(
+        self, keepalive: float = SSE_KEEPALIVE_SECONDS
+    ) -> AsyncIterator[str]:
+        """Yield events until the stream is closed."""
+        while True:
+            try:
+                event = await asyncio.wait_for(self._events.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield event
+            if self.closed and self._events.empty():
+                return
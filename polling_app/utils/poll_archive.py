@@ -0,0 +1,96 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..crud import utc
+
+# Directory of the archived votes of closed polls
+POLL_ARCHIVE_DIR = os.getenv("POLL_ARCHIVE_DIR", "./poll_archive")
+
+ArchivedVote = Tuple[str, str, str, Optional[datetime]]
+
+
+class PollArchive:
+    """Read-only store of the votes of closed polls, one file per poll.
+
+    A file is a gzip-compressed sequence of blocks, one JSON line each,
+    holding a chunk of votes column by column: vote ids, usernames, each
+    vote's index into the block's choice ids and its timestamp as seconds
+    after the block's first vote. Long runs of similar values compress far
+    better than rows would, and blocks are written and read one at a time,
+    so a poll of any size is archived in bounded memory. A file is written
+    under a temporary name and renamed, so one that exists is complete.
+    """
+
+    def __init__(self, directory: str = POLL_ARCHIVE_DIR):
+        self.directory = directory
+
+    def _path(self, poll_id: str) -> str:
+        return os.path.join(self.directory, f"{poll_id}.jsonl.gz")
+
+    def exists(self, poll_id: str) -> bool:
+        return os.path.exists(self._path(poll_id))
+
+    def write(self, poll_id: str, chunks: Iterable[List[ArchivedVote]]) -> None:
+        """Archive chunks of (id, choice_id, username, timestamp) votes."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(poll_id)
+        with open(path + ".tmp", "wb") as raw:
+            with gzip.open(raw, "wt", encoding="utf-8") as f:
+                for votes in chunks:
+                    if votes:
+                        f.write(json.dumps(_block(votes), separators=(",", ":")))
+                        f.write("\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(path + ".tmp", path)
+
+    def read(self, poll_id: str) -> Iterator[ArchivedVote]:
+        """The archived votes of a poll, block by block; none without an archive."""
+        if not self.exists(poll_id):
+            return
+        with gzip.open(self._path(poll_id), "rt", encoding="utf-8") as f:
+            for line in f:
+                block: Dict[str, Any] = json.loads(line)
+                choices, start = block["choices"], block["start"]
+                for vote_id, username, choice, offset in zip(
+                    block["id"], block["username"], block["choice"], block["timestamp"]
+                ):
+                    moment = (
+                        None
+                        if offset is None
+                        else datetime.fromtimestamp(start + offset, timezone.utc)
+                    )
+                    yield vote_id, choices[choice], username, moment
+
+    def remove(self, poll_id: str) -> None:
+        """Drop the archive of a deleted poll, if it has one."""
+        try:
+            os.remove(self._path(poll_id))
+        except FileNotFoundError:
+            pass
+
+
+def _block(votes: List[ArchivedVote]) -> Dict[str, Any]:
+    choices: Dict[str, int] = {}
+    # Votes stored before timestamps were recorded have none
+    stamps = [utc(t).timestamp() if t else None for _, _, _, t in votes]
+    start = next((stamp for stamp in stamps if stamp is not None), 0.0)
+    return {
+        "start": start,
+        "id": [vote_id for vote_id, _, _, _ in votes],
+        "username": [username for _, _, username, _ in votes],
+        "choice": [
+            choices.setdefault(choice_id, len(choices)) for _, choice_id, _, _ in votes
+        ],
+        "timestamp": [
+            None if stamp is None else round(stamp - start, 6) for stamp in stamps
+        ],
+        "choices": list(choices),
+    }
+
+
+# Global poll archive instance
+poll_archive = PollArchive()
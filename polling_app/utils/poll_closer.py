@@ -0,0 +1,133 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from .. import crud
+from ..database import AsyncSessionLocal, SessionLocal
+from .poll_archive import PollArchive, poll_archive
+from .poll_purger import POLL_PURGE_CHUNK_SIZE
+
+# Seconds between checks for polls to close and archive
+POLL_CLOSE_CHECK_SECONDS = float(os.getenv("POLL_CLOSE_CHECK_SECONDS", "5"))
+# Seconds a closed poll keeps its votes in the votes table before they are
+# moved to the poll archive, negative never archives
+POLL_ARCHIVE_AFTER_SECONDS = int(os.getenv("POLL_ARCHIVE_AFTER_SECONDS", "86400"))
+
+
+class PollCloser:
+    """Closes polls when their closes_at passes and archives their votes.
+
+    The closes_at of open polls are kept in memory, so a vote for a poll
+    past its deadline is turned away without a query; the vote statements
+    check closes_at as well, for polls this process does not know about.
+    Every interval, polls past their deadline are marked closed, which
+    makes their vote counters the final tallies. Polls closed for
+    archive_after seconds have their votes written to the archive and then
+    deleted from the votes table in chunks, while their results are still
+    served from the frozen counters.
+    """
+
+    def __init__(
+        self,
+        interval: float = POLL_CLOSE_CHECK_SECONDS,
+        archive_after: int = POLL_ARCHIVE_AFTER_SECONDS,
+        archive: PollArchive = poll_archive,
+        chunk_size: int = POLL_PURGE_CHUNK_SIZE,
+    ):
+        self.interval = interval
+        self.archive_after = archive_after
+        self.archive = archive
+        self.chunk_size = chunk_size
+        self._deadlines: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.closed = 0
+        self.archived = 0
+
+    def watch(self, poll_id: str, closes_at: Optional[datetime]) -> None:
+        """Remember when a new poll closes."""
+        if closes_at is not None:
+            self._deadlines[poll_id] = crud.utc(closes_at)
+
+    def forget(self, poll_id: str) -> None:
+        """Stop tracking a deleted poll."""
+        self._deadlines.pop(poll_id, None)
+
+    def is_closed(self, poll_id: str, now: Optional[datetime] = None) -> bool:
+        """Whether a known poll is past its deadline; unknown polls are not."""
+        return crud.is_closed(self._deadlines.get(poll_id), now)
+
+    async def start(self) -> None:
+        """Load the deadlines of open polls and start checking them."""
+        async with AsyncSessionLocal() as db:
+            self._deadlines.update(await crud.get_closing_polls_async(db))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                # Retried on the next tick
+                pass
+            await asyncio.sleep(self.interval)
+
+    async def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """Close the polls past their deadline, then archive the due ones.
+
+        Returns the polls closed.
+        """
+        now = now or datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            closed = await crud.close_due_polls_async(db, now)
+            archivable: List[str] = []
+            if self.archive_after >= 0:
+                cutoff = now - timedelta(seconds=self.archive_after)
+                archivable = await crud.get_archivable_poll_ids_async(db, cutoff)
+        self.closed += len(closed)
+        for poll_id in closed:
+            # Including polls created by other processes
+            self._deadlines.setdefault(poll_id, now)
+        for poll_id in archivable:
+            await self.archive_poll(poll_id)
+        return closed
+
+    async def archive_poll(self, poll_id: str) -> None:
+        """Move a closed poll's votes from the votes table to the archive."""
+        # An archive left by an interrupted run already holds every vote
+        if not self.archive.exists(poll_id):
+            await asyncio.to_thread(self._write_archive, poll_id)
+        while True:
+            async with AsyncSessionLocal() as db:
+                deleted = await crud.delete_archived_votes_async(
+                    db, poll_id, self.chunk_size
+                )
+            if deleted < self.chunk_size:
+                break
+            await asyncio.sleep(0)
+        async with AsyncSessionLocal() as db:
+            await crud.mark_archived_async(db, poll_id)
+        # Later votes are rejected by the vote statements
+        self._deadlines.pop(poll_id, None)
+        self.archived += 1
+
+    def _write_archive(self, poll_id: str) -> None:
+        # Runs in a worker thread, streaming the votes into the archive a
+        # chunk at a time, so neither the loop nor memory holds them all
+        with SessionLocal() as db:
+            chunks = crud.iter_poll_votes(db, poll_id, self.chunk_size)
+            self.archive.write(poll_id, chunks)
+
+
+# Global poll closer instance
+poll_closer = PollCloser()
@@ -0,0 +1,65 @@
+import asyncio
+import os
+from typing import Dict
+
+from .. import crud
+from ..database import AsyncSessionLocal
+from .poll_archive import poll_archive
+
+# Votes deleted per transaction when purging a deleted poll
+POLL_PURGE_CHUNK_SIZE = int(os.getenv("POLL_PURGE_CHUNK_SIZE", "5000"))
+
+
+class PollPurger:
+    """Deletes the rows of deleted polls in the background.
+
+    Deleting a poll only marks it deleted, which hides it at once. The
+    purger then removes its votes in chunks of chunk_size, each in its own
+    short transaction, so a poll with millions of votes neither holds a
+    long write lock nor loads its votes into the session. Polls left marked
+    by a previous process are purged when the purger starts.
+    """
+
+    def __init__(self, chunk_size: int = POLL_PURGE_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.purged = 0
+
+    def schedule(self, poll_id: str) -> None:
+        """Purge a deleted poll, unless it is already being purged."""
+        if poll_id not in self._tasks:
+            task = asyncio.create_task(self.purge(poll_id))
+            self._tasks[poll_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(poll_id, None))
+
+    async def purge(self, poll_id: str) -> None:
+        """Delete a deleted poll's votes chunk by chunk, then the poll itself."""
+        while True:
+            async with AsyncSessionLocal() as db:
+                deleted = await crud.purge_poll_chunk_async(
+                    db, poll_id, self.chunk_size
+                )
+            self.purged += deleted
+            if deleted < self.chunk_size:
+                poll_archive.remove(poll_id)
+                return
+            # Let requests waiting on the database in between chunks
+            await asyncio.sleep(0)
+
+    async def start(self) -> None:
+        """Resume purging the polls deleted before a restart."""
+        async with AsyncSessionLocal() as db:
+            poll_ids = await crud.get_deleted_poll_ids_async(db)
+        for poll_id in poll_ids:
+            self.schedule(poll_id)
+
+    async def stop(self) -> None:
+        """Cancel the purges in progress; start() resumes them."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global poll purger instance
+poll_purger = PollPurger()
@@ -0,0 +1,71 @@
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Past deltas kept per poll for clients resuming with last_seq
+DELTA_REPLAY_SIZE = int(os.getenv("WS_DELTA_REPLAY_SIZE", "256"))
+# Polls whose delta history is kept, least recently used dropped first
+DELTA_STREAM_POLLS = int(os.getenv("WS_DELTA_STREAM_POLLS", "4096"))
+
+
+class PollStream:
+    """Sequence-numbered history of one poll's results, for delta updates.
+
+    Each change of the results gets the next sequence number and is kept in
+    a bounded replay buffer, so a client that reconnects with the last
+    sequence number it saw can be sent only what it missed. Sequence numbers
+    restart with every stream, so each one has its own epoch.
+    """
+
+    __slots__ = ("epoch", "seq", "results", "_votes", "_replay")
+
+    def __init__(
+        self, results: List[Dict[str, Any]], replay_size: int = DELTA_REPLAY_SIZE
+    ):
+        self.epoch = uuid.uuid4().hex
+        self.seq = 0
+        self.results = results
+        self._votes = {row["id"]: row["votes"] for row in results}
+        # (seq, changed choices)
+        self._replay: Deque[Tuple[int, List[Dict[str, Any]]]] = deque(
+            maxlen=replay_size
+        )
+
+    def diff(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The choices whose votes differ from the current results."""
+        return [
+            {"id": row["id"], "votes": row["votes"]}
+            for row in results
+            if self._votes.get(row["id"]) != row["votes"]
+        ]
+
+    def advance(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Record new results, returning the changed choices.
+
+        The sequence number only moves when something changed.
+        """
+        changes = self.diff(results)
+        if changes:
+            self.seq += 1
+            self.results = results
+            self._votes = {row["id"]: row["votes"] for row in results}
+            self._replay.append((self.seq, changes))
+        return changes
+
+    def changes_since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """Merged changes after seq, or None if the replay buffer lost them."""
+        if seq < 0 or seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._replay or self._replay[0][0] > seq + 1:
+            return None
+        merged: Dict[str, int] = {}
+        for change_seq, changes in self._replay:
+            if change_seq > seq:
+                for change in changes:
+                    merged[change["id"]] = change["votes"]
+        return [
+            {"id": choice_id, "votes": votes} for choice_id, votes in merged.items()
+        ]
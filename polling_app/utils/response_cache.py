@@ -0,0 +1,82 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Budget for cached response bodies, 0 disables the cache
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+
+class ResponseCache:
+    """In-process LRU cache of rendered poll bodies, keyed by poll version.
+
+    Each poll keeps only the body of the version it was rendered at; a body
+    is served only to a request that read the same version, so a vote makes
+    it unreachable without any invalidation. Entries are evicted least
+    recently used first once their total size exceeds the byte budget.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._bodies: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._size = 0
+        # Sync routes run in a thread pool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, poll_id: str, version: int) -> Optional[bytes]:
+        """Return the body rendered at this version, or None."""
+        with self._lock:
+            entry = self._bodies.get(poll_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(poll_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, poll_id: str, version: int, body: bytes) -> None:
+        """Cache the body of a poll rendered at a version."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._bodies.get(poll_id)
+            if previous is not None:
+                if previous[0] > version:
+                    # A newer version was rendered meanwhile
+                    return
+                self._size -= len(previous[1])
+            self._bodies[poll_id] = (version, body)
+            self._bodies.move_to_end(poll_id)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._bodies.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self, poll_id: str) -> None:
+        """Drop the cached body of a poll."""
+        with self._lock:
+            entry = self._bodies.pop(poll_id, None)
+            if entry is not None:
+                self._size -= len(entry[1])
+
+    def clear(self) -> None:
+        """Drop every cached body."""
+        with self._lock:
+            self._bodies.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters and the current footprint."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._bodies),
+                "bytes": self._size,
+            }
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flights:
+    """Shared bookkeeping of the single-flight helpers.
+
+    Flights are numbered in the order their reads begin. A caller passes the
+    number returned by mark() at the point from which it needs the value; it
+    only joins a flight whose read begins at or after that, so it is never
+    handed a value read before a write it has seen.
+    """
+
+    def __init__(self) -> None:
+        self._started = 0
+        # Calls answered by another caller's flight
+        self.collapsed = 0
+
+    def mark(self) -> int:
+        """Number of the next read to begin."""
+        return self._started
+
+
+class _Flight:
+    __slots__ = ("number", "task", "done", "result", "error")
+
+    def __init__(self, number: Optional[int] = None):
+        # None until the read begins
+        self.number = number
+        self.task: Any = None
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Any = None
+
+    def joinable(self, since: int) -> bool:
+        return self.number is None or self.number >= since
+
+
+class SingleFlight(_Flights):
+    """Collapse concurrent identical reads on the event loop into one.
+
+    The read runs as its own task, so it completes for the other callers when
+    the one that started it is cancelled; it must not use that caller's
+    database session.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(
+        self, key: Hashable, read: Callable[[], Awaitable[T]], since: int = 0
+    ) -> T:
+        """Return read(), sharing a flight under the same key begun from since."""
+        flight = self._flights.get(key)
+        if flight is not None and flight.joinable(since):
+            self.collapsed += 1
+        else:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.ensure_future(self._fly(flight, read))
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+        return await asyncio.shield(flight.task)
+
+    async def _fly(self, flight: _Flight, read: Callable[[], Awaitable[T]]) -> T:
+        flight.number = self._started
+        self._started += 1
+        return await read()
+
+    def _land(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Retrieved, so an error nobody awaits any more is not reported
+            flight.task.exception()
+
+
+class ThreadSingleFlight(_Flights):
+    """Collapse concurrent identical reads of sync routes into one."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def mark(self) -> int:
+        with self._lock:
+            return self._started
+
+    def do(self, key: Hashable, read: Callable[[], T], since: int = 0) -> T:
+        """Return read(), sharing a flight under the same key begun from since."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or not flight.joinable(since)
+            if leader:
+                flight = self._flights[key] = _Flight(self._started)
+                self._started += 1
+            else:
+                self.collapsed += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = read()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+
+# Single-flight layer of the sync HTTP routes
+http_reads = ThreadSingleFlight()
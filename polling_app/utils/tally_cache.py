@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+TALLY_CACHE_SIZE = int(os.getenv("TALLY_CACHE_SIZE", "1024"))
+
+
+class TallyCache:
+    """In-process LRU cache of per-poll vote tallies.
+
+    Each entry maps choice_id to its result row for one poll. Entries are
+    warmed lazily from the database and incremented in place on every vote,
+    so hot polls serve their results without touching the database. The
+    cache is per process: run a single worker or disable it
+    (``TALLY_CACHE_SIZE=0``) when votes can land in other processes.
+    """
+
+    def __init__(self, max_polls: int = TALLY_CACHE_SIZE):
+        self.max_polls = max_polls
+        self._polls: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        # Sync routes run in a thread pool, async ones on the event loop
+        self._lock = threading.Lock()
+        # Bumped by writes the cache could not apply; a load that raced with
+        # one of them is not stored, as it may predate the write
+        self._generation = 0
+
+    def generation(self) -> int:
+        """Token to pass to put() once the results have been loaded."""
+        with self._lock:
+            return self._generation
+
+    def get(self, poll_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached results of a poll, or None."""
+        with self._lock:
+            choices = self._polls.get(poll_id)
+            if choices is None:
+                return None
+            self._polls.move_to_end(poll_id)
+            return [dict(row) for row in choices.values()]
+
+    def put(self, poll_id: str, results: List[Dict[str, Any]], generation: int) -> None:
+        """Cache results loaded after generation() returned the given token.
+
+        An entry already cached is kept: increments keep it current, while
+        the results being put may have been read before one of them.
+        """
+        if self.max_polls <= 0:
+            return
+        with self._lock:
+            if generation != self._generation or poll_id in self._polls:
+                return
+            self._polls[poll_id] = {row["id"]: dict(row) for row in results}
+            self._polls.move_to_end(poll_id)
+            while len(self._polls) > self.max_polls:
+                self._polls.popitem(last=False)
+
+    def increment(self, poll_id: str, choice_id: str, amount: int = 1) -> None:
+        """Apply a committed vote to the cached tally of a poll."""
+        with self._lock:
+            choices = self._polls.get(poll_id)
+            if choices is None or choice_id not in choices:
+                self._generation += 1
+                return
+            choices[choice_id]["votes"] += amount
+
+    def invalidate(self, poll_id: str) -> None:
+        """Drop the cached tally of a poll."""
+        with self._lock:
+            self._polls.pop(poll_id, None)
+            self._generation += 1
+
+    def clear(self) -> None:
+        """Drop every cached tally."""
+        with self._lock:
+            self._polls.clear()
+            self._generation += 1
+
+    def __len__(self) -> int:
+        return len(self._polls)
+
+
+# Global tally cache instance
+tally_cache = TallyCache()
@@ -0,0 +1,270 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Where votes are stored: "db" for the votes table, "log" for the vote log
+VOTE_STORE = os.getenv("VOTE_STORE", "db")
+VOTE_LOG_DIR = os.getenv("VOTE_LOG_DIR", "./vote_log")
+# Records appended between tally snapshots
+VOTE_LOG_SNAPSHOT_EVERY = int(os.getenv("VOTE_LOG_SNAPSHOT_EVERY", "100000"))
+# Whether each append waits for the disk, set to 0 to trade durability for speed
+VOTE_LOG_FSYNC = os.getenv("VOTE_LOG_FSYNC", "1") != "0"
+
+# A record is a body, poll id, choice id, username digest and timestamp,
+# followed by the CRC32 of the body and padding to 64 bytes
+BODY = struct.Struct("<16s16s16sd")
+TRAILER = struct.Struct("<I4x")
+BODY_SIZE = BODY.size
+RECORD_SIZE = BODY.size + TRAILER.size
+# Choice of the record written when a poll is deleted
+TOMBSTONE = bytes(16)
+SNAPSHOT = "snapshot.json"
+# Held by the process that has the log open
+LOCK = "LOCK"
+
+
+class VoteLogLockedError(RuntimeError):
+    pass
+
+
+def user_digest(username: str) -> bytes:
+    return hashlib.blake2b(username.encode(), digest_size=16).digest()
+
+
+class VoteLog:
+    """Append-only vote store made of fixed-size records in log segments.
+
+    Votes are appended to the current segment; tallies and the voters of
+    each poll, which reject duplicate votes, are kept in memory. Every
+    snapshot_every records a snapshot of that state is written and a new
+    segment started, so opening the log loads the latest snapshot and only
+    replays the segments written after it, read through mmap. compact()
+    also deletes the segments the snapshot covers.
+
+    A record that fails its checksum ends the log: it is a torn write from a
+    crash, and the segment is truncated there. The log belongs to a single
+    process, which holds an exclusive lock on the directory while it has the
+    log open; opening it elsewhere meanwhile raises VoteLogLockedError.
+
+    Snapshots are written by a background thread from a copy of the state,
+    so appends only wait for the copy. Appends fsync, so callers on an event
+    loop run them in a worker thread.
+    """
+
+    def __init__(
+        self,
+        directory: str = VOTE_LOG_DIR,
+        snapshot_every: int = VOTE_LOG_SNAPSHOT_EVERY,
+        fsync: bool = VOTE_LOG_FSYNC,
+    ):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._tallies: Dict[str, Dict[str, int]] = {}
+        self._voters: Dict[str, Set[bytes]] = {}
+        self._segment = 0
+        self._since_snapshot = 0
+        # Segment of the newest snapshot on disk
+        self._snapshotted = 0
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._snapshotter: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = open(os.path.join(directory, LOCK), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise VoteLogLockedError(
+                f"Vote log {directory} is in use by another process"
+            )
+        self._recover()
+        self._file = open(self._path(self._segment), "ab")
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:08d}.log")
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[:-4])
+            for name in os.listdir(self.directory)
+            if name.endswith(".log")
+        )
+
+    def _recover(self) -> None:
+        first = 0
+        path = os.path.join(self.directory, SNAPSHOT)
+        if os.path.exists(path):
+            with open(path) as f:
+                snapshot = json.load(f)
+            first = self._snapshotted = snapshot["segment"]
+            self._tallies = snapshot["tallies"]
+            self._voters = {
+                poll_id: {bytes.fromhex(d) for d in digests}
+                for poll_id, digests in snapshot["voters"].items()
+            }
+        self._segment = first
+        # Segments before the snapshot's are folded into it
+        for segment in self._segments():
+            if segment < first:
+                continue
+            self._segment = segment
+            for record in self._replay(segment):
+                self._apply(*record)
+                self._since_snapshot += 1
+
+    def _replay(self, segment: int) -> Iterator[Tuple[str, Optional[str], bytes]]:
+        path = self._path(segment)
+        size = os.path.getsize(path)
+        end = 0
+        if size:
+            with open(path, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    while end + RECORD_SIZE <= size:
+                        record = data.read(RECORD_SIZE)
+                        body = record[:BODY_SIZE]
+                        (crc,) = TRAILER.unpack_from(record, BODY_SIZE)
+                        if zlib.crc32(body) != crc:
+                            break
+                        poll, choice, user, _ = BODY.unpack(body)
+                        yield str(uuid.UUID(bytes=poll)), _choice_id(choice), user
+                        end += RECORD_SIZE
+        if end < size:
+            # Torn tail left by a crash
+            os.truncate(path, end)
+
+    def _apply(self, poll_id: str, choice_id: Optional[str], user: bytes) -> None:
+        if choice_id is None:
+            self._tallies.pop(poll_id, None)
+            self._voters.pop(poll_id, None)
+            return
+        tally = self._tallies.setdefault(poll_id, {})
+        tally[choice_id] = tally.get(choice_id, 0) + 1
+        self._voters.setdefault(poll_id, set()).add(user)
+
+    def _write(self, records: List[bytes]) -> None:
+        self._file.write(b"".join(records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._since_snapshot += len(records)
+        if self._since_snapshot >= self.snapshot_every:
+            state = self._roll()
+            # Skipped while a snapshot is being written; a later one covers it
+            if self._snapshotter is None or not self._snapshotter.is_alive():
+                self._snapshotter = threading.Thread(
+                    target=self._save_snapshot, args=(state,), daemon=True
+                )
+                self._snapshotter.start()
+
+    @staticmethod
+    def _record(poll_id: str, choice: bytes, user: bytes) -> bytes:
+        body = BODY.pack(uuid.UUID(poll_id).bytes, choice, user, time.time())
+        return body + TRAILER.pack(zlib.crc32(body))
+
+    def append(self, poll_id: str, choice_id: str, username: str) -> bool:
+        """Record a vote, False when the user already voted in the poll."""
+        return self.append_many(poll_id, [(choice_id, username)])[0]
+
+    def append_many(self, poll_id: str, votes: List[Tuple[str, str]]) -> List[bool]:
+        """Record (choice_id, username) votes with one write and one fsync.
+
+        Returns whether each vote was recorded; a user's later votes in the
+        poll, in the log or earlier in the list, are not.
+        """
+        with self._lock:
+            voters = self._voters.setdefault(poll_id, set())
+            recorded, records = [], []
+            for choice_id, username in votes:
+                user = user_digest(username)
+                if user in voters:
+                    recorded.append(False)
+                    continue
+                records.append(self._record(poll_id, uuid.UUID(choice_id).bytes, user))
+                self._apply(poll_id, choice_id, user)
+                recorded.append(True)
+            if records:
+                self._write(records)
+            return recorded
+
+    def forget(self, poll_id: str) -> None:
+        """Drop a deleted poll's votes, now and on the next recovery."""
+        with self._lock:
+            if poll_id in self._tallies or poll_id in self._voters:
+                self._apply(poll_id, None, bytes(16))
+                self._write([self._record(poll_id, TOMBSTONE, bytes(16))])
+
+    def count(self, poll_id: str, choice_id: str) -> int:
+        return self._tallies.get(poll_id, {}).get(choice_id, 0)
+
+    def total(self, poll_id: str) -> int:
+        """Votes recorded for a poll, which only ever grows."""
+        return sum(self._tallies.get(poll_id, {}).values())
+
+    def _roll(self) -> Dict[str, Any]:
+        # Starts a new segment and copies the state, which a snapshot of then
+        # covers every earlier segment; called with the lock held
+        self._file.close()
+        self._segment += 1
+        self._file = open(self._path(self._segment), "ab")
+        self._since_snapshot = 0
+        return {
+            "segment": self._segment,
+            "tallies": {p: dict(t) for p, t in self._tallies.items()},
+            "voters": {p: set(v) for p, v in self._voters.items()},
+        }
+
+    def _save_snapshot(self, state: Dict[str, Any]) -> None:
+        with self._snapshot_lock:
+            if state["segment"] <= self._snapshotted:
+                # A newer snapshot is already on disk
+                return
+            snapshot = {
+                "segment": state["segment"],
+                "tallies": state["tallies"],
+                "voters": {
+                    p: sorted(d.hex() for d in v) for p, v in state["voters"].items()
+                },
+            }
+            path = os.path.join(self.directory, SNAPSHOT)
+            with open(path + ".tmp", "w") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self._snapshotted = state["segment"]
+
+    def compact(self) -> int:
+        """Snapshot the current state and delete the segments it covers.
+
+        Returns the number of segments deleted. Appends only wait while the
+        state is copied.
+        """
+        with self._lock:
+            state = self._roll()
+        self._save_snapshot(state)
+        old = [s for s in self._segments() if s < state["segment"]]
+        for segment in old:
+            os.remove(self._path(segment))
+        return len(old)
+
+    def close(self) -> None:
+        """Close the log, once any snapshot being written is on disk."""
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        with self._lock:
+            self._file.close()
+        # Closing the file releases the directory lock
+        self._lock_file.close()
+
+
+def _choice_id(choice: bytes) -> Optional[str]:
+    return None if choice == TOMBSTONE else str(uuid.UUID(bytes=choice))
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from polling_app import schemas
+from polling_app.utils.connection_manager import connection_manager
+
+from .. import crud
+from ..database import AsyncSessionLocal
+
+# Milliseconds a vote may wait for others to share its commit, 0 disables
+# write-behind and commits every vote in its own request
+VOTE_GROUP_COMMIT_MS = int(os.getenv("VOTE_GROUP_COMMIT_MS", "0"))
+# Most votes committed together
+VOTE_GROUP_COMMIT_SIZE = int(os.getenv("VOTE_GROUP_COMMIT_SIZE", "500"))
+
+Pending = Tuple[str, schemas.VoteCreate, "asyncio.Future[Dict[str, Any]]"]
+
+
+class VoteWriter:
+    """Write-behind buffer committing the votes of concurrent requests together.
+
+    A vote waits at most max_delay_ms for others, or until max_batch votes
+    are pending, then they are all written in one transaction: one commit,
+    and on SQLite one fsync, for the whole group. Each caller gets its own
+    outcome once the group is committed. Votes are checked in arrival order,
+    so a user's second vote is rejected as if the votes had been committed
+    one by one.
+    """
+
+    def __init__(
+        self,
+        max_delay_ms: int = VOTE_GROUP_COMMIT_MS,
+        max_batch: int = VOTE_GROUP_COMMIT_SIZE,
+    ):
+        self.max_delay_ms = max_delay_ms
+        self.max_batch = max_batch
+        self._pending: List[Pending] = []
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Groups committed, reported by GET /polls/stats
+        self.commits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the writer, when write-behind is enabled."""
+        if self.max_delay_ms > 0 and not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer once the pending votes are committed."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            await self.flush()
+
+    async def submit(self, poll_id: str, vote: schemas.VoteCreate) -> Dict[str, Any]:
+        """Queue a vote and return its outcome once its group is committed."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((poll_id, vote, future))
+        self._arrived.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            await self._arrived.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Commit up to max_batch pending votes as one group."""
+        size = self.max_batch
+        group, self._pending = self._pending[:size], self._pending[size:]
+        if not self._pending:
+            self._arrived.clear()
+        if len(self._pending) < self.max_batch:
+            self._full.clear()
+        if not group:
+            return
+
+        votes: Dict[str, List[schemas.VoteCreate]] = {}
+        for poll_id, vote, _ in group:
+            votes.setdefault(poll_id, []).append(vote)
+        try:
+            async with AsyncSessionLocal() as db:
+                outcomes = await crud.create_votes_for_polls_async(db, votes)
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.commits += 1
+
+        # Hand each poll's outcomes back in the order its votes arrived
+        remaining = {poll_id: iter(results) for poll_id, results in outcomes.items()}
+        for poll_id, _, future in group:
+            outcome = next(remaining[poll_id])
+            if not future.done():
+                future.set_result(outcome)
+
+        # One broadcast per poll for the whole group
+        for poll_id, results in outcomes.items():
+            if any(outcome["status"] == "ok" for outcome in results):
+                connection_manager.mark_dirty(poll_id)
+        if not connection_manager.coalescing:
+            try:
+                await connection_manager.flush_dirty()
+            except Exception:
+                # The votes are committed, flush_dirty() has put the polls
+                # back for the next group
+                pass
+
+
+# Global vote writer instance
+vote_writer = VoteWriter()
@@ -1,21 +1,27 @@
-import json
 from typing import Any, Optional
 
 from fastapi import WebSocket
 
 from polling_app import constants as C
+from polling_app.utils.codecs import Frame
 
 
-async def send_error(ws: WebSocket, code: str, message: str):
-    await ws.send_text(
-        json.dumps({"type": C.TYPE_ERROR, "code": code, "message": message})
-    )
+def error_frame(code: str, message: str) -> dict[str, Any]:
+    return {"type": C.TYPE_ERROR, "code": code, "message": message}
 
 
-async def send_success(
-    ws: WebSocket, action: str, payload: Optional[dict[str, Any]] = None
-):
+def success_frame(
+    action: str, payload: Optional[dict[str, Any]] = None
+) -> dict[str, Any]:
     response: dict[str, Any] = {"type": C.TYPE_SUCCESS, "action": action}
     if payload:
         response["data"] = payload
-    await ws.send_text(json.dumps(response))
+    return response
+
+
+async def send_frame(ws: WebSocket, frame: Frame):
+    # Binary codecs produce bytes, JSON produces text
+    if isinstance(frame, bytes):
+        await ws.send_bytes(frame)
+    else:
+        await ws.send_text(frame)
@@ -6,4 +6,11 @@ from polling_app.main import app
 class TestBase:
     @classmethod
     def setup_class(cls):
+        # Entered so every request and WebSocket shares one event loop, as
+        # they do under uvicorn
         cls.client = TestClient(app)
+        cls.client.__enter__()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.client.__exit__(None, None, None)
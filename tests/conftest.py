@@ -1,3 +1,9 @@
 import os
 
 os.environ["DATABASE_URL"] = "sqlite:///./polls_test.db"
+
+# Start every run from a fresh schema
+if os.path.exists("./polls_test.db"):
+    os.remove("./polls_test.db")
+
+import polling_app.main  # noqa: E402,F401 - creates the schema
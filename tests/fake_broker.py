@@ -0,0 +1,57 @@
+import asyncio
+from typing import Dict, Set
+
+from polling_app.utils.backplane import encode_command
+
+
+class FakeRedisBroker:
+    """Minimal in-memory Redis speaking just enough RESP for pub/sub."""
+
+    def __init__(self):
+        self.channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self.published = 0
+        self._server: asyncio.AbstractServer
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{port}/0"
+
+    async def stop(self) -> None:
+        self._server.close()
+        for subscribers in self.channels.values():
+            for writer in subscribers:
+                writer.close()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list:
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _serve(self, reader, writer) -> None:
+        try:
+            while True:
+                command, *args = await self._read_command(reader)
+                if command.upper() == b"SUBSCRIBE":
+                    for channel in args:
+                        self.channels.setdefault(channel, set()).add(writer)
+                        writer.write(
+                            b"*3\r\n$9\r\nsubscribe\r\n"
+                            + b"$%d\r\n%s\r\n:1\r\n" % (len(channel), channel)
+                        )
+                elif command.upper() == b"PUBLISH":
+                    channel, payload = args
+                    subscribers = self.channels.get(channel, set())
+                    for subscriber in subscribers:
+                        subscriber.write(encode_command("message", channel, payload))
+                    self.published += 1
+                    writer.write(b":%d\r\n" % len(subscribers))
+                else:
+                    writer.write(b"+OK\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            for subscribers in self.channels.values():
+                subscribers.discard(writer)
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from polling_app import constants as C
+from polling_app.utils.backplane import (
+    InProcessBackplane,
+    RedisBackplane,
+    create_backplane,
+)
+from polling_app.utils.connection_manager import ConnectionManager
+from tests.fake_broker import FakeRedisBroker
+from tests.test_connection_manager import FakeWebSocket, subscribe
+
+
+def test_create_backplane():
+    assert isinstance(create_backplane(""), InProcessBackplane)
+    backplane = create_backplane("redis://:secret@cache:6380/0")
+    assert isinstance(backplane, RedisBackplane)
+    assert (backplane.host, backplane.port, backplane.password) == (
+        "cache",
+        6380,
+        "secret",
+    )
+
+
+def test_broadcast_reaches_every_node():
+    async def run():
+        broker = FakeRedisBroker()
+        url = await broker.start()
+        voter = ConnectionManager(backplane=RedisBackplane(url))
+        viewer = ConnectionManager(backplane=RedisBackplane(url))
+        await voter.start()
+        await viewer.start()
+
+        local, remote = FakeWebSocket(), FakeWebSocket()
+        await subscribe(voter, local, "p")
+        await subscribe(viewer, remote, "p")
+
+        await voter.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await asyncio.sleep(0.05)
+        await voter.cleanup_poll("p")
+        await asyncio.sleep(0.05)
+
+        await voter.stop()
+        await viewer.stop()
+        await broker.stop()
+        return broker, local, remote, viewer
+
+    broker, local, remote, viewer = asyncio.run(run())
+    assert broker.published == 2
+    for ws in (local, remote):
+        messages = [json.loads(m) for m in ws.messages[1:]]
+        assert messages[0]["action"] == C.ACTION_UPDATE
+        assert messages[1]["code"] == C.ERR_POLL_DELETED
+    assert viewer.get_connection_count("p") == 0
+
+
+def test_unreachable_backplane_still_serves_local_sockets():
+    async def run():
+        manager = ConnectionManager(
+            backplane=RedisBackplane("redis://127.0.0.1:1/0", reconnect_delay=60)
+        )
+        await manager.backplane.start(timeout=0.01)
+        ws = FakeWebSocket()
+        await subscribe(manager, ws, "p")
+        await manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        return ws
+
+    ws = asyncio.run(run())
+    assert json.loads(ws.messages[-1])["action"] == C.ACTION_UPDATE
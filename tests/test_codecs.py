@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from polling_app import constants as C
+from polling_app.utils.codecs import (
+    CODECS,
+    DEFAULT_CODEC,
+    FLAG_DEFLATE,
+    FLAG_RAW,
+    DeflateMsgpackCodec,
+    negotiate,
+)
+from polling_app.utils.connection_manager import ConnectionManager
+from tests import assertion_helper
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_connection_manager import FakeWebSocket, subscribe
+
+# Binary codecs are only offered when msgpack is installed
+msgpack = pytest.importorskip("msgpack")
+
+MESSAGE = {"type": C.TYPE_SUCCESS, "action": C.ACTION_UPDATE, "data": {"n": 1}}
+
+
+def test_codecs_round_trip():
+    for codec in CODECS.values():
+        assert codec.decode(codec.encode(MESSAGE)) == MESSAGE
+
+
+def test_negotiate_picks_first_supported():
+    assert negotiate(["graphql-ws", "msgpack", "json"]).name == "msgpack"
+    assert negotiate(["graphql-ws"]) is None
+    assert negotiate([]) is None
+
+
+def test_deflate_only_large_frames():
+    codec = DeflateMsgpackCodec(min_bytes=64)
+    assert codec.encode(MESSAGE)[0] == FLAG_RAW
+    large = {"data": {"results": [{"text": "choice " * 20}] * 20}}
+    frame = codec.encode(large)
+    assert frame[0] == FLAG_DEFLATE
+    assert len(frame) < len(msgpack.packb(large))
+    assert codec.decode(frame) == large
+
+
+def test_broadcast_encodes_once_per_codec():
+    async def run():
+        manager = ConnectionManager()
+        sockets = [
+            FakeWebSocket(subprotocols=offered)
+            for offered in ([], ["msgpack"], ["msgpack"], ["msgpack+deflate"])
+        ]
+        for ws in sockets:
+            await subscribe(manager, ws, "p")
+        await manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await asyncio.sleep(0.01)
+        return sockets
+
+    sockets = asyncio.run(run())
+    assert [ws.subprotocol for ws in sockets] == [
+        None,
+        "msgpack",
+        "msgpack",
+        "msgpack+deflate",
+    ]
+    assert isinstance(sockets[0].messages[-1], str)
+    assert sockets[1].messages[-1] is sockets[2].messages[-1]
+    for ws in sockets:
+        codec = CODECS[ws.subprotocol] if ws.subprotocol else DEFAULT_CODEC
+        update = codec.decode(ws.messages[-1])
+        assert update["data"] == {"poll_id": "p"}
+
+
+class TestMsgpackSubprotocol(TestBase):
+    def test_subscribe_and_update_over_msgpack(self):
+        poll = create_color_poll(self.client)
+        poll_id = poll["id"]
+        choice_id = poll["choices"][0]["id"]
+        codec = CODECS["msgpack"]
+        with self.client.websocket_connect("/polls/ws", subprotocols=["msgpack"]) as ws:
+            assert ws.accepted_subprotocol == "msgpack"
+            assert codec.decode(ws.receive_bytes())["action"] == C.ACTION_CONNECT
+            ws.send_bytes(
+                codec.encode({"action": C.ACTION_SUBSCRIBE, "poll_id": poll_id})
+            )
+            snapshot = codec.decode(ws.receive_bytes())
+            assertion_helper.assert_vote_count(
+                snapshot["data"]["results"], choice_id, 0
+            )
+            self.client.post(
+                f"/polls/{poll_id}/vote",
+                json={"username": "alice", "choice_id": choice_id},
+            )
+            update = codec.decode(ws.receive_bytes())
+            assert update["action"] == C.ACTION_UPDATE
+            assertion_helper.assert_vote_count(update["data"]["results"], choice_id, 1)
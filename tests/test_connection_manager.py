@@ -0,0 +1,258 @@
+import asyncio
+import json
+from typing import Any, Optional
+
+from polling_app import constants as C
+from polling_app import crud, schemas
+from polling_app.database import SessionLocal
+from polling_app.utils import connection_manager as cm
+from polling_app.utils.client_connection import (
+    OVERFLOW_CONFLATE,
+    OVERFLOW_DISCONNECT,
+    OVERFLOW_DROP_OLDEST,
+    ClientConnection,
+)
+from polling_app.utils.codecs import JsonCodec
+from polling_app.utils.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(
+        self,
+        fail: bool = False,
+        stalled: bool = False,
+        subprotocols: Optional[list[str]] = None,
+    ):
+        self.fail = fail
+        self.stalled = stalled
+        self.closed = False
+        self.messages: list[Any] = []
+        self.scope = {"subprotocols": subprotocols or []}
+        self.subprotocol: Optional[str] = None
+        self.inbox: list[str] = []
+
+    async def accept(self, subprotocol: Optional[str] = None) -> None:
+        self.subprotocol = subprotocol
+
+    async def send_text(self, message: str) -> None:
+        if self.fail:
+            raise RuntimeError("closed")
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.messages.append(message)
+
+    async def send_bytes(self, message: bytes) -> None:
+        await self.send_text(message)  # type: ignore
+
+    async def receive(self) -> dict[str, Any]:
+        return {"type": "websocket.receive", "text": self.inbox.pop(0)}
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+async def subscribe(manager: ConnectionManager, ws: FakeWebSocket, poll_id: str):
+    await manager.connect(ws)  # type: ignore
+    client = manager._clients[ws]  # type: ignore
+    manager._connections.setdefault(poll_id, set()).add(client)
+    client.polls.add(poll_id)
+
+
+def test_broadcast_serializes_once_and_evicts_failed_sockets(monkeypatch):
+    calls = []
+    encode = JsonCodec.encode
+
+    def counting_encode(self, message):
+        calls.append(message)
+        return encode(self, message)
+
+    async def run():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(50)]
+        for ws in sockets:
+            await subscribe(manager, ws, "p")
+        sockets[3].fail = True
+        monkeypatch.setattr(JsonCodec, "encode", counting_encode)
+        await manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await asyncio.sleep(0.01)
+        return manager, sockets
+
+    manager, sockets = asyncio.run(run())
+    assert len(calls) == 1
+    assert manager.get_connection_count("p") == 49
+    assert manager.evicted == 1
+    assert sockets[3].closed
+    update = json.loads(sockets[0].messages[-1])
+    assert update["data"] == {"poll_id": "p"}
+
+
+def test_stalled_socket_does_not_hold_up_broadcast():
+    async def run():
+        manager = ConnectionManager()
+        stalled, healthy = FakeWebSocket(), FakeWebSocket()
+        await subscribe(manager, stalled, "p")
+        await subscribe(manager, healthy, "p")
+        stalled.stalled = True
+        await asyncio.wait_for(
+            manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"}), 1
+        )
+        await asyncio.sleep(0.01)
+        return healthy
+
+    healthy = asyncio.run(run())
+    assert json.loads(healthy.messages[-1])["action"] == C.ACTION_UPDATE
+
+
+def test_overflow_policies():
+    async def run(overflow: str):
+        evicted = []
+        ws = FakeWebSocket(stalled=True)
+        client = ClientConnection(ws, evicted.append, max_queue=2, overflow=overflow)
+        await asyncio.sleep(0)
+        client.enqueue("a1", key="a")
+        client.enqueue("b1", key="b")
+        accepted = client.enqueue("a2", key="a")
+        queued = [message for _, message in client._queue]
+        client.close()
+        return accepted, queued
+
+    assert asyncio.run(run(OVERFLOW_DROP_OLDEST)) == (True, ["b1", "a2"])
+    assert asyncio.run(run(OVERFLOW_CONFLATE)) == (True, ["b1", "a2"])
+    assert asyncio.run(run(OVERFLOW_DISCONNECT)) == (False, ["a1", "b1"])
+
+
+def test_conflate_replaces_the_same_poll():
+    async def run():
+        client = ClientConnection(
+            FakeWebSocket(stalled=True), print, max_queue=2, overflow=OVERFLOW_CONFLATE
+        )
+        for message, key in [("a1", "a"), ("b1", "b"), ("b2", "b")]:
+            client.enqueue(message, key)
+        queued = [message for _, message in client._queue]
+        client.close()
+        return queued
+
+    assert asyncio.run(run()) == ["a1", "b2"]
+
+
+def test_replies_are_queued_behind_updates():
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await subscribe(manager, ws, "p")
+        await manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await manager.unsubscribe_from_poll(ws, "p")  # type: ignore
+        manager.send_error(ws, C.ERR_UNKNOWN_ACTION, "Unknown action x")  # type: ignore
+        await manager.disconnect(ws)  # type: ignore
+        return ws
+
+    ws = asyncio.run(run())
+    frames = [json.loads(m) for m in ws.messages[1:]]
+    assert [f.get("action", f.get("code")) for f in frames] == [
+        C.ACTION_UPDATE,
+        C.ACTION_UNSUBSCRIBE,
+        C.ERR_UNKNOWN_ACTION,
+        C.ACTION_DISCONNECT,
+    ]
+    assert ws.closed
+
+
+def test_overflowing_client_is_evicted():
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await subscribe(manager, ws, "p")
+        ws.stalled = True
+        manager._clients[ws].overflow = OVERFLOW_DISCONNECT  # type: ignore
+        manager._clients[ws].max_queue = 1  # type: ignore
+        for _ in range(3):
+            await manager.broadcast_to_poll("p", C.ACTION_UPDATE, {"poll_id": "p"})
+        await asyncio.sleep(0)
+        return manager, ws
+
+    manager, ws = asyncio.run(run())
+    assert manager.get_connection_count("p") == 0
+    assert manager.get_total_connections() == 0
+    assert manager.evicted == 1
+    assert ws.closed
+
+
+def test_coalesced_votes_broadcast_once_per_tick():
+    db = SessionLocal()
+    poll = crud.create_poll(
+        db,
+        schemas.PollCreate(
+            title="Tick", question="?", choices=[schemas.ChoiceCreate(text="a")]
+        ),
+    )
+    poll_id, choice_id = poll.id, poll.choices[0].id
+
+    async def run() -> FakeWebSocket:
+        manager = ConnectionManager(coalesce_ms=20)
+        ws = FakeWebSocket()
+        await subscribe(manager, ws, poll_id)
+        await manager.start()
+        assert manager.coalescing
+        for i in range(25):
+            crud.create_vote(
+                db, poll_id, schemas.VoteCreate(username=f"u{i}", choice_id=choice_id)
+            )
+            manager.mark_dirty(poll_id)
+        await asyncio.sleep(0.1)
+        await manager.stop()
+        return ws
+
+    ws = asyncio.run(run())
+    db.close()
+    updates = [json.loads(m) for m in ws.messages[1:]]
+    assert len(updates) == 1
+    assert updates[0]["action"] == C.ACTION_UPDATE
+    assert updates[0]["data"]["results"][0]["votes"] == 25
+
+
+def test_failed_flush_keeps_polls_dirty(monkeypatch):
+    async def failing_read(db, poll_ids):
+        raise RuntimeError("database unavailable")
+
+    async def run():
+        manager = ConnectionManager()
+        await subscribe(manager, FakeWebSocket(), "p")
+        manager.mark_dirty("p")
+        monkeypatch.setattr(cm.crud, "get_results_for_polls_async", failing_read)
+        try:
+            await manager.flush_dirty()
+        except RuntimeError:
+            pass
+        return manager
+
+    assert asyncio.run(run())._dirty == {"p"}
+
+
+def test_heartbeat_pings_and_reaps_silent_clients():
+    async def run():
+        manager = ConnectionManager(heartbeat_interval=20, max_missed=2)
+        legacy, answering, opted = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await subscribe(manager, legacy, "p")
+        await subscribe(manager, answering, "p")
+        # Opted in at connect time, then went half-open before any pong
+        await manager.connect(opted, answers_pings=True)  # type: ignore
+        start = manager._clients[legacy].last_seen  # type: ignore
+        assert manager.reap(now=start + 5) == 0
+        assert manager.reap(now=start + 30) == 0
+        await asyncio.sleep(0.01)
+        pinged = [json.loads(m)["action"] for m in answering.messages[1:]]
+        answering.inbox.append(json.dumps({"action": C.ACTION_PONG}))
+        await manager.receive(answering)  # type: ignore
+        assert manager.reap(now=start + 60) == 0
+        reaped = [manager.reap(now=start + 90), manager.reap(now=start + 120)]
+        await asyncio.sleep(0.01)
+        return manager, legacy, answering, opted, pinged, reaped
+
+    manager, legacy, answering, opted, pinged, reaped = asyncio.run(run())
+    assert pinged == [C.ACTION_PING]
+    # The pong reset the count, so the answering client lasted a ping longer
+    assert reaped == [1, 1] and manager.reaped == 2
+    assert opted.closed and answering.closed
+    # Clients that never answered a ping nor opted in are not reaped
+    assert not legacy.closed
+    assert manager.get_connection_count("p") == 1
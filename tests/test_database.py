@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from polling_app.database import async_engine, engine, to_async_url
+from polling_app.utils.poll_closer import PollCloser
+from tests.base import TestBase
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./polls.db") == "sqlite+aiosqlite:///./polls.db"
+    assert (
+        to_async_url("postgresql+psycopg2://u:p@db/polls")
+        == "postgresql+asyncpg://u:p@db/polls"
+    )
+    assert to_async_url("postgres://db/polls") == "postgresql+asyncpg://db/polls"
+    assert to_async_url("mysql+aiomysql://db/polls") == "mysql+aiomysql://db/polls"
+
+
+class TestDatetimeBinding(TestBase):
+    def test_datetimes_are_bound_as_naive_utc(self):
+        # asyncpg rejects aware datetimes for timestamp without time zone
+        aware = []
+
+        def before_cursor_execute(conn, cursor, statement, params, context, many):
+            for bound in context.compiled_parameters or []:
+                aware.extend(
+                    value
+                    for value in bound.values()
+                    if isinstance(value, datetime) and value.tzinfo is not None
+                )
+
+        engines = [engine, async_engine.sync_engine]
+        for e in engines:
+            event.listen(e, "before_cursor_execute", before_cursor_execute)
+        try:
+            later = datetime.now(timezone(timedelta(hours=2))) + timedelta(days=1)
+            res = self.client.post(
+                "/polls/",
+                json={
+                    "title": "Dates",
+                    "question": "?",
+                    "choices": [{"text": "a"}],
+                    "closes_at": later.isoformat(),
+                },
+            )
+            poll_id, choice_id = res.json()["id"], res.json()["choices"][0]["id"]
+            url = f"/polls/{poll_id}"
+            vote = {"username": "alice", "choice_id": choice_id}
+            assert self.client.post(f"{url}/vote", json=vote).status_code == 200
+            vote["username"] = "bob"
+            self.client.post(f"{url}/votes:batch", json=[vote])
+            self.client.portal.call(PollCloser(archive_after=-1).tick, later)
+            assert self.client.delete(url).status_code == 200
+        finally:
+            for e in engines:
+                event.remove(e, "before_cursor_execute", before_cursor_execute)
+        assert aware == []
@@ -1,5 +1,12 @@
+from polling_app import constants as C
+from polling_app import crud
 from polling_app.database import SessionLocal
 from polling_app.models import Choice, Poll, Vote
+from polling_app.utils.poll_purger import PollPurger, poll_purger
+from polling_app.utils.tally_cache import tally_cache
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_query_counts import count_queries
 
 
 def test_delete_poll_cascades():
@@ -16,8 +23,8 @@ def test_delete_poll_cascades():
     db_session.commit()
 
     # Add votes
-    vote1 = Vote(username="alice", choice=choice1)
-    vote2 = Vote(username="bob", choice=choice2)
+    vote1 = Vote(username="alice", choice=choice1, poll_id=poll.id)
+    vote2 = Vote(username="bob", choice=choice2, poll_id=poll.id)
     db_session.add_all([vote1, vote2])
     db_session.commit()
 
@@ -44,3 +51,44 @@ def test_delete_poll_cascades():
         .count()
         == 0
     )
+
+
+class TestDeleteLargePoll(TestBase):
+    def test_delete_hides_poll_and_purges_in_chunks(self, monkeypatch):
+        poll = create_color_poll(self.client)
+        poll_id, red = poll["id"], poll["choices"][0]["id"]
+        for user in ["a", "b", "c"]:
+            payload = {"username": user, "choice_id": red}
+            self.client.post(f"/polls/{poll_id}/vote", json=payload)
+
+        scheduled = []
+        monkeypatch.setattr(poll_purger, "schedule", scheduled.append)
+        assert self.client.delete(f"/polls/{poll_id}").status_code == 200
+        assert scheduled == [poll_id]
+
+        # Gone for clients at once, while its rows wait for the purger
+        assert self.client.get(f"/polls/{poll_id}").status_code == 404
+        assert self.client.delete(f"/polls/{poll_id}").status_code == 404
+        assert poll_id not in [p["id"] for p in self.client.get("/polls/").json()]
+        payload = {"username": "d", "choice_id": red}
+        res = self.client.post(f"/polls/{poll_id}/vote", json=payload)
+        assert res.status_code == 404
+        db = SessionLocal()
+        assert db.query(Vote).filter(Vote.poll_id == poll_id).count() == 3
+        assert poll_id in crud.get_deleted_poll_ids(db)
+        # Reads while the purge is pending neither see nor cache its tally
+        assert crud.get_results_for_polls(db, [poll_id]) == {poll_id: []}
+        assert tally_cache.get(poll_id) is None
+        with self.client.websocket_connect(f"/polls/ws/{poll_id}") as ws:
+            ws.receive_json()
+            assert ws.receive_json()["code"] == C.ERR_POLL_NOT_FOUND
+
+        purger = PollPurger(chunk_size=2)
+        with count_queries() as statements:
+            self.client.portal.call(purger.purge, poll_id)
+        assert purger.purged == 3
+        assert sum(1 for s in statements if s.startswith("DELETE FROM votes")) == 2
+        assert db.query(Vote).filter(Vote.poll_id == poll_id).count() == 0
+        assert db.query(Choice).filter(Choice.poll_id == poll_id).count() == 0
+        assert db.get(Poll, poll_id) is None
+        db.close()
@@ -0,0 +1,121 @@
+import json
+
+from polling_app import constants as C
+from polling_app.utils.poll_stream import PollStream
+from tests import assertion_helper
+from tests.base import TestBase
+from tests.helper import create_color_poll
+
+
+def results(*votes):
+    return [{"id": str(i), "text": str(i), "votes": v} for i, v in enumerate(votes)]
+
+
+def test_stream_advances_only_on_change():
+    stream = PollStream(results(0, 0))
+    assert stream.advance(results(0, 0)) == []
+    assert stream.seq == 0
+    assert stream.advance(results(1, 0)) == [{"id": "0", "votes": 1}]
+    assert stream.advance(results(1, 2)) == [{"id": "1", "votes": 2}]
+    assert stream.seq == 2
+
+
+def test_each_stream_has_its_own_epoch():
+    assert PollStream(results(0)).epoch != PollStream(results(0)).epoch
+
+
+def test_stream_replays_merged_changes():
+    stream = PollStream(results(0, 0), replay_size=2)
+    for votes in ((1, 0), (2, 0), (2, 1)):
+        stream.advance(results(*votes))
+    assert stream.changes_since(3) == []
+    assert stream.changes_since(1) == [{"id": "0", "votes": 2}, {"id": "1", "votes": 1}]
+    # Seq 1 fell out of the replay buffer, and seq 4 never happened
+    assert stream.changes_since(0) is None
+    assert stream.changes_since(4) is None
+
+
+class TestDeltaUpdates(TestBase):
+
+    def setup_method(self):
+        self.poll = create_color_poll(self.client)
+        self.poll_id = self.poll["id"]
+        self.choice_id = self.poll["choices"][0]["id"]
+
+    def vote(self, username: str):
+        payload = {"username": username, "choice_id": self.choice_id}
+        res = self.client.post(f"/polls/{self.poll_id}/vote", json=payload)
+        assert res.status_code == 200
+
+    def connect(self, query: str = ""):
+        return self.client.websocket_connect(
+            f"/polls/ws/{self.poll_id}?mode=delta{query}"
+        )
+
+    def snapshot(self, ws):
+        assertion_helper.assert_successful_connect(ws.receive_text())
+        return json.loads(ws.receive_text())["data"]
+
+    def test_updates_are_deltas(self):
+        with self.connect() as ws:
+            snapshot = self.snapshot(ws)
+            assert snapshot["seq"] == 0
+            assert len(snapshot["results"]) == 3
+
+            self.vote("alice")
+            message = json.loads(ws.receive_text())
+            assert message["action"] == C.ACTION_DELTA
+            assert message["data"] == {
+                "poll_id": self.poll_id,
+                "epoch": snapshot["epoch"],
+                "seq": 1,
+                "changes": [{"id": self.choice_id, "votes": 1}],
+            }
+
+    def test_resume_sends_only_missed_changes(self):
+        # The watcher keeps the poll's stream fed while the client is away
+        with self.connect() as watcher:
+            self.snapshot(watcher)
+            with self.connect() as ws:
+                epoch = self.snapshot(ws)["epoch"]
+
+            self.vote("alice")
+            self.vote("bob")
+            with self.connect(f"&epoch={epoch}&last_seq=0") as ws:
+                data = self.snapshot(ws)
+            assert data["seq"] == 2
+            assert data["changes"] == [{"id": self.choice_id, "votes": 2}]
+            assert "results" not in data
+
+    def test_unknown_epoch_gets_full_results(self):
+        with self.connect("&epoch=elsewhere&last_seq=5") as ws:
+            data = self.snapshot(ws)
+        assert "changes" not in data
+        assert data["results"][0]["votes"] == 0
+
+    def test_malformed_last_seq_gets_full_results(self):
+        with self.client.websocket_connect("/polls/ws?mode=delta") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            with self.connect() as other:
+                epoch = self.snapshot(other)["epoch"]
+            message = {
+                "action": C.ACTION_SUBSCRIBE,
+                "poll_id": self.poll_id,
+                "epoch": epoch,
+                "last_seq": "0",
+            }
+            ws.send_text(json.dumps(message))
+            data = json.loads(ws.receive_text())["data"]
+        assert data["results"][0]["votes"] == 0
+
+    def test_subscribe_many_carries_sequences(self):
+        with self.client.websocket_connect("/polls/ws?mode=delta") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            message = {"action": C.ACTION_SUBSCRIBE_MANY, "poll_ids": [self.poll_id]}
+            ws.send_text(json.dumps(message))
+            (data,) = json.loads(ws.receive_text())["data"]["polls"]
+            assert data["seq"] == 0 and data["epoch"]
+
+            self.vote("alice")
+            delta = json.loads(ws.receive_text())["data"]
+            assert (delta["epoch"], delta["seq"]) == (data["epoch"], 1)
@@ -0,0 +1,69 @@
+from polling_app import crud
+from polling_app.utils.etags import etag_matches, poll_etag
+from tests.base import TestBase
+from tests.helper import create_color_poll, create_lunch_poll
+from tests.test_query_counts import count_queries, select_count
+
+
+def test_etag_matches():
+    assert etag_matches('"a.1"', '"a.1"')
+    assert etag_matches('"x", W/"a.1"', '"a.1"')
+    assert etag_matches("*", '"a.1"')
+    assert not etag_matches('"a.2"', '"a.1"')
+    assert not etag_matches(None, '"a.1"')
+
+
+class TestConditionalGet(TestBase):
+    def vote(self, poll, username: str):
+        res = self.client.post(
+            f"/polls/{poll['id']}/vote",
+            json={"username": username, "choice_id": poll["choices"][0]["id"]},
+        )
+        assert res.status_code == 200
+
+    def test_poll_not_modified_until_voted(self):
+        poll = create_color_poll(self.client)
+        url = f"/polls/{poll['id']}"
+        etag = self.client.get(url).headers["etag"]
+
+        with count_queries() as statements:
+            res = self.client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 304
+        assert res.headers["etag"] == etag
+        assert res.content == b""
+        # Only the version is read
+        assert select_count(statements) == 1
+
+        self.vote(poll, "alice")
+        res = self.client.get(url, headers={"If-None-Match": etag})
+        assert res.status_code == 200
+        assert res.headers["etag"] != etag
+        assert res.json()["choices"][0]["votes"] == 1
+
+    def test_conditional_get_of_missing_poll(self):
+        res = self.client.get("/polls/missing", headers={"If-None-Match": '"x"'})
+        assert res.status_code == 404
+
+    def test_list_etag_changes_with_any_poll(self):
+        poll = create_color_poll(self.client)
+        etag = self.client.get("/polls/").headers["etag"]
+        res = self.client.get("/polls/", headers={"If-None-Match": etag})
+        assert res.status_code == 304
+
+        self.vote(poll, "bob")
+        voted = self.client.get("/polls/", headers={"If-None-Match": etag})
+        assert voted.status_code == 200
+        create_lunch_poll(self.client)
+        res = self.client.get(
+            "/polls/", headers={"If-None-Match": voted.headers["etag"]}
+        )
+        assert res.status_code == 200
+
+    def test_etag_labels_the_rendered_version(self, monkeypatch):
+        poll = create_color_poll(self.client)
+        self.vote(poll, "alice")
+        # A vote lands between the version read and the render
+        monkeypatch.setattr(crud, "get_poll_version", lambda db, poll_id: 1)
+        res = self.client.get(f"/polls/{poll['id']}")
+        assert res.json()["choices"][0]["votes"] == 1
+        assert res.headers["etag"] == poll_etag(poll["id"], 2)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+import time
+
+from polling_app import constants as C
+from polling_app import crud, schemas
+from polling_app.database import SessionLocal
+from polling_app.utils.connection_manager import ConnectionManager, connection_manager
+from polling_app.utils.event_stream import (
+    EVENT_STREAM_CODEC,
+    EventStream,
+    parse_last_event_id,
+)
+from polling_app.utils.ws_helpers import error_frame, success_frame
+from tests.base import TestBase
+from tests.helper import create_color_poll
+
+
+def test_events_carry_id_and_name():
+    event = EVENT_STREAM_CODEC.encode(
+        success_frame(C.ACTION_DELTA, {"epoch": "e", "seq": 3, "changes": []})
+    )
+    lines = event.split("\n")
+    assert lines[:2] == ["id: e:3", "event: delta"]
+    assert json.loads(lines[2].removeprefix("data: "))["data"]["seq"] == 3
+    assert event.endswith("\n\n")
+    error = EVENT_STREAM_CODEC.encode(error_frame(C.ERR_POLL_DELETED, "gone"))
+    assert error.startswith(f"event: {C.ERR_POLL_DELETED}\n")
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("abc:12") == ("abc", 12)
+    assert parse_last_event_id(None) == (None, None)
+    assert parse_last_event_id("12") == (None, None)
+    assert parse_last_event_id("abc:x") == (None, None)
+
+
+def test_stream_resumes_from_last_event_id():
+    db = SessionLocal()
+    poll = crud.create_poll(
+        db,
+        schemas.PollCreate(
+            title="Events", question="?", choices=[schemas.ChoiceCreate(text="a")]
+        ),
+    )
+    poll_id = poll.id
+    results = crud.get_poll_results(db, poll_id)
+    db.close()
+
+    async def subscribe(manager, last_event_id=None):
+        sink = EventStream()
+        manager.attach(sink, delta=True, codec=EVENT_STREAM_CODEC)
+        epoch, last_seq = parse_last_event_id(last_event_id)
+        await manager.subscribe_to_poll(sink, poll_id, last_seq, epoch)
+        return sink.events(keepalive=1)
+
+    async def run():
+        manager = ConnectionManager()
+        first = await subscribe(manager)
+        snapshot = await first.__anext__()
+        voted = [dict(results[0], votes=1)]
+        await manager.broadcast_to_poll(
+            poll_id, C.ACTION_UPDATE, {"poll_id": poll_id, "results": voted}
+        )
+        delta = await first.__anext__()
+        last_event_id = snapshot.split("\n")[0].removeprefix("id: ")
+        resumed = await (await subscribe(manager, last_event_id)).__anext__()
+        return snapshot, delta, resumed
+
+    snapshot, delta, resumed = asyncio.run(run())
+    epoch = snapshot.split("\n")[0].removeprefix("id: ").split(":")[0]
+    assert snapshot.startswith(f"id: {epoch}:0\nevent: {C.ACTION_SUBSCRIBE}")
+    assert delta.startswith(f"id: {epoch}:1\nevent: {C.ACTION_DELTA}")
+    data = json.loads(resumed.split("\n")[2].removeprefix("data: "))["data"]
+    assert data["changes"] == [{"id": results[0]["id"], "votes": 1}]
+
+
+class TestEventStream(TestBase):
+    def test_unknown_poll_is_404(self):
+        assert self.client.get("/polls/missing/events").status_code == 404
+        assert connection_manager.get_total_connections() == 0
+
+    def test_stream_until_poll_deleted(self):
+        poll = create_color_poll(self.client)
+        poll_id = poll["id"]
+        choice_id = poll["choices"][0]["id"]
+        response = {}
+
+        def listen():
+            response["res"] = self.client.get(f"/polls/{poll_id}/events")
+
+        listener = threading.Thread(target=listen)
+        listener.start()
+        while connection_manager.get_connection_count(poll_id) == 0:
+            time.sleep(0.01)
+        self.client.post(
+            f"/polls/{poll_id}/vote", json={"username": "alice", "choice_id": choice_id}
+        )
+        self.client.delete(f"/polls/{poll_id}")
+        listener.join(5)
+
+        res = response["res"]
+        assert res.headers["content-type"].startswith("text/event-stream")
+        assert res.headers["cache-control"] == "no-cache"
+        events = [block.split("\n") for block in res.text.strip().split("\n\n")]
+        names = [
+            line for lines in events for line in lines if line.startswith("event:")
+        ]
+        assert names == [
+            f"event: {C.ACTION_SUBSCRIBE}",
+            f"event: {C.ACTION_DELTA}",
+            f"event: {C.ERR_POLL_DELETED}",
+        ]
+        epoch = events[0][0].split(":")[1].strip()
+        assert events[1][0] == f"id: {epoch}:1"
+        assert connection_manager.get_total_connections() == 0
@@ -0,0 +1,53 @@
+import json
+
+from tests.base import TestBase
+from tests.helper import create_color_poll, create_lunch_poll
+
+
+class TestPagination(TestBase):
+    def setup_method(self):
+        self.created = [
+            create_color_poll(self.client)["id"],
+            create_lunch_poll(self.client)["id"],
+            create_color_poll(self.client)["id"],
+        ]
+
+    def test_pages_cover_the_list_in_order(self):
+        everything = [poll["id"] for poll in self.client.get("/polls/").json()]
+        assert everything[-3:] == self.created
+
+        paged = []
+        url = "/polls/?limit=2"
+        while url:
+            res = self.client.get(url)
+            assert res.status_code == 200
+            page = res.json()
+            assert len(page) <= 2
+            paged += [poll["id"] for poll in page]
+            url = res.links.get("next", {}).get("url")
+        assert paged == everything
+
+    def test_page_etag(self):
+        res = self.client.get("/polls/?limit=1")
+        cached = self.client.get(
+            "/polls/?limit=1", headers={"If-None-Match": res.headers["etag"]}
+        )
+        assert cached.status_code == 304
+        assert cached.headers["link"] == res.headers["link"]
+
+    def test_ndjson_stream(self):
+        everything = self.client.get("/polls/").json()
+        res = self.client.get("/polls/", headers={"Accept": "application/x-ndjson"})
+        assert res.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        assert lines == everything
+
+        page = self.client.get(
+            "/polls/?limit=2", headers={"Accept": "application/x-ndjson"}
+        )
+        assert [json.loads(line) for line in page.text.splitlines()] == everything[:2]
+        assert "next" in page.links
+
+    def test_invalid_paging(self):
+        assert self.client.get("/polls/?cursor=nonsense").status_code == 400
+        assert self.client.get("/polls/?limit=0").status_code == 422
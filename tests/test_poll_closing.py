@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from polling_app import crud
+from polling_app.database import SessionLocal
+from polling_app.models import Poll, Vote
+from polling_app.routers import voting
+from polling_app.utils.poll_archive import PollArchive
+from polling_app.utils.poll_closer import PollCloser
+from tests.base import TestBase
+from tests.test_query_counts import count_queries
+
+
+def test_archive_round_trips_blocks(tmp_path):
+    archive = PollArchive(str(tmp_path))
+    at = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    chunks = [
+        [("v1", "red", "alice", at), ("v2", "green", "bob", None)],
+        [("v3", "red", "carol", at.replace(tzinfo=None) + timedelta(seconds=1.5))],
+    ]
+    archive.write("p", iter(chunks))
+    assert list(archive.read("p")) == [
+        ("v1", "red", "alice", at),
+        ("v2", "green", "bob", None),
+        ("v3", "red", "carol", at + timedelta(seconds=1.5)),
+    ]
+    assert list(archive.read("missing")) == []
+
+
+class TestPollClosing(TestBase):
+    @pytest.fixture(autouse=True)
+    def closer(self, tmp_path, monkeypatch):
+        closer = PollCloser(archive_after=0, archive=PollArchive(str(tmp_path)))
+        closer.chunk_size = 1
+        monkeypatch.setattr(voting, "poll_closer", closer)
+        yield closer
+
+    def create_poll(self, closes_at):
+        res = self.client.post(
+            "/polls/",
+            json={
+                "title": "Closing Poll",
+                "question": "Open or closed?",
+                "choices": [{"text": "open"}, {"text": "closed"}],
+                "closes_at": closes_at.isoformat(),
+            },
+        )
+        assert res.status_code == 200
+        return res.json()
+
+    def test_known_closed_poll_rejects_votes_without_queries(self, closer):
+        past = datetime.now(timezone.utc) - timedelta(minutes=1)
+        poll = self.create_poll(past)
+        closer.watch(poll["id"], past)
+        payload = {"username": "alice", "choice_id": poll["choices"][0]["id"]}
+
+        with count_queries() as statements:
+            res = self.client.post(f"/polls/{poll['id']}/vote", json=payload)
+        assert res.status_code == 400
+        assert res.json()["detail"] == "Poll is closed"
+        assert statements == []
+
+    def test_close_freezes_and_archives_votes(self, closer):
+        poll = self.create_poll(datetime.now(timezone.utc) + timedelta(days=1))
+        poll_id, red = poll["id"], poll["choices"][0]["id"]
+        assert poll["closes_at"] is not None
+        url = f"/polls/{poll_id}/vote"
+        for user in ["alice", "bob"]:
+            payload = {"username": user, "choice_id": red}
+            assert self.client.post(url, json=payload).status_code == 200
+
+        # The deadline passes; this process has not seen it, the database has
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        db.get(Poll, poll_id).closes_at = now - timedelta(seconds=1)
+        db.commit()
+        res = self.client.post(url, json={"username": "carol", "choice_id": red})
+        assert res.json()["detail"] == "Poll is closed"
+        res = self.client.post(
+            f"/polls/{poll_id}/votes:batch",
+            json=[{"username": "carol", "choice_id": red}],
+        )
+        assert res.json()["results"] == [
+            {"status": "error", "detail": "Poll is closed"}
+        ]
+
+        assert poll_id in self.client.portal.call(closer.tick, now)
+        assert closer.archived >= 1
+        assert closer.closed >= 1
+        db.expire_all()
+        assert db.get(Poll, poll_id).archived_at is not None
+        assert db.query(Vote).filter(Vote.poll_id == poll_id).count() == 0
+        assert [v[2] for v in closer.archive.read(poll_id)] == ["alice", "bob"]
+        assert not [
+            m for m in crud.find_vote_count_mismatches(db) if m["poll_id"] == poll_id
+        ]
+        db.close()
+
+        # Results are served from the frozen counters
+        res = self.client.get(f"/polls/{poll_id}")
+        assert res.json()["choices"][0]["votes"] == 2
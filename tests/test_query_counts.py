@@ -0,0 +1,119 @@
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from polling_app.database import async_engine, engine
+from polling_app.utils.tally_cache import tally_cache
+from tests import assertion_helper
+from tests.base import TestBase
+from tests.helper import create_color_poll, create_lunch_poll
+
+
+@contextmanager
+def count_queries():
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engines = [engine, async_engine.sync_engine]
+    for e in engines:
+        event.listen(e, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", before_cursor_execute)
+
+
+def select_count(statements: list[str]) -> int:
+    return sum(1 for s in statements if s.lstrip().upper().startswith("SELECT"))
+
+
+class TestQueryCounts(TestBase):
+    """Query budgets of the cold path, with no tally cached."""
+
+    def test_list_polls_query_count_is_constant(self):
+        create_color_poll(self.client)
+        create_lunch_poll(self.client)
+        tally_cache.clear()
+        with count_queries() as statements:
+            res = self.client.get("/polls/")
+        assert res.status_code == 200
+        assert len(res.json()) >= 2
+        # One query for the polls, one grouped query for every tally
+        assert select_count(statements) == 2
+
+    def test_get_poll_query_count(self):
+        poll = create_color_poll(self.client)
+        tally_cache.clear()
+        with count_queries() as statements:
+            res = self.client.get(f"/polls/{poll['id']}")
+        assert res.status_code == 200
+        assert [c["text"] for c in res.json()["choices"]] == ["red", "green", "blue"]
+        assert select_count(statements) == 2
+
+    def test_create_poll_query_count(self):
+        with count_queries() as statements:
+            create_lunch_poll(self.client)
+        # The refresh of the new poll plus the tally of its choices
+        assert select_count(statements) == 2
+
+    def test_subscribe_query_count(self):
+        poll = create_color_poll(self.client)
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            tally_cache.clear()
+            with count_queries() as statements:
+                ws.send_text(json.dumps({"action": "subscribe", "poll_id": poll["id"]}))
+                assertion_helper.assert_successful_subscription(
+                    ws.receive_text(), poll["id"], poll["choices"][0]["id"], 0
+                )
+            # One query both finds the poll and reads its tally
+            assert select_count(statements) == 1
+
+    def test_subscribe_many_query_count(self):
+        poll_ids = [create_color_poll(self.client)["id"] for _ in range(5)]
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            tally_cache.clear()
+            message = {"action": "subscribe_many", "poll_ids": poll_ids + ["999"]}
+            with count_queries() as statements:
+                ws.send_text(json.dumps(message))
+                data = json.loads(ws.receive_text())["data"]
+            assert len(data["polls"]) == 5 and len(data["errors"]) == 1
+            # One IN query for existence, one grouped query for the tallies
+            assert select_count(statements) == 2
+
+    def test_open_socket_holds_no_connection(self):
+        poll = create_color_poll(self.client)
+        tally_cache.clear()
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            ws.send_text(json.dumps({"action": "subscribe", "poll_id": poll["id"]}))
+            assertion_helper.assert_successful_subscription(
+                ws.receive_text(), poll["id"], poll["choices"][0]["id"], 0
+            )
+            # Once the next message is handled the subscribe has returned
+            ws.send_text(json.dumps({"action": "noop"}))
+            ws.receive_text()
+            # The session was only borrowed for the snapshot
+            assert async_engine.sync_engine.pool.checkedout() == 0
+
+    def test_vote_is_a_single_insert(self):
+        poll = create_color_poll(self.client)
+        vote = {"username": "alice", "choice_id": poll["choices"][0]["id"]}
+        with count_queries() as statements:
+            res = self.client.post(f"/polls/{poll['id']}/vote", json=vote)
+        assert res.status_code == 200
+        # INSERT ... SELECT, the counter and version bumps; the tally comes
+        # from the cache
+        assert select_count(statements) == 0
+        assert len(statements) == 3
+
+        with count_queries() as statements:
+            res = self.client.post(f"/polls/{poll['id']}/vote", json=vote)
+        assert res.status_code == 400
+        assert res.json()["detail"] == "User has already voted in this poll"
+        assert len(statements) == 1
@@ -0,0 +1,66 @@
+from polling_app.utils.response_cache import ResponseCache, response_cache
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_query_counts import count_queries, select_count
+
+
+def test_served_only_at_the_same_version():
+    cache = ResponseCache()
+    cache.put("a", 1, b"one")
+    assert cache.get("a", 1) == b"one"
+    assert cache.get("a", 2) is None
+    # A slower render of an older version does not replace a newer one
+    cache.put("a", 2, b"two")
+    cache.put("a", 1, b"one")
+    assert cache.get("a", 2) == b"two"
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_evicts_by_size():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", 1, b"aaaa")
+    cache.put("b", 1, b"bbbb")
+    cache.get("a", 1)
+    cache.put("c", 1, b"cccc")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == b"aaaa"
+    assert cache.stats()["bytes"] == 8
+    cache.put("d", 1, b"d" * 11)
+    assert cache.get("d", 1) is None
+
+
+class TestResponseCache(TestBase):
+    def test_repeated_get_served_from_cache(self):
+        poll = create_color_poll(self.client)
+        url = f"/polls/{poll['id']}"
+        first = self.client.get(url)
+        hits = response_cache.hits
+        with count_queries() as statements:
+            second = self.client.get(url)
+        assert second.content == first.content
+        assert second.json() == poll
+        assert response_cache.hits == hits + 1
+        # Only the version is read
+        assert select_count(statements) == 1
+
+        self.client.post(
+            f"/polls/{poll['id']}/vote",
+            json={"username": "alice", "choice_id": poll["choices"][0]["id"]},
+        )
+        assert self.client.get(url).json()["choices"][0]["votes"] == 1
+
+    def test_list_reuses_poll_bodies(self):
+        poll = create_color_poll(self.client)
+        self.client.get(f"/polls/{poll['id']}")
+        listed = self.client.get("/polls/").json()
+        assert poll in listed
+
+    def test_stats_exposed(self):
+        res = self.client.get("/polls/stats")
+        assert res.status_code == 200
+        assert set(res.json()["response_cache"]) == {
+            "hits",
+            "misses",
+            "entries",
+            "bytes",
+        }
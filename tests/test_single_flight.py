@@ -0,0 +1,145 @@
+import asyncio
+import threading
+
+import pytest
+
+from polling_app import crud, schemas
+from polling_app.database import SessionLocal
+from polling_app.utils import connection_manager as cm
+from polling_app.utils.single_flight import SingleFlight, ThreadSingleFlight
+from polling_app.utils.tally_cache import tally_cache
+from tests.test_connection_manager import FakeWebSocket
+
+
+def test_concurrent_reads_share_one_flight():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def read():
+            calls.append(1)
+            await release.wait()
+            return len(calls)
+
+        waiting = [asyncio.ensure_future(flights.do("k", read)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiting)
+        # A later caller starts its own flight
+        assert await flights.do("k", read) == 2
+        return flights, results
+
+    flights, results = asyncio.run(run())
+    assert results == [1] * 5
+    assert flights.collapsed == 4
+
+
+def test_flights_started_before_the_caller_are_not_joined():
+    async def run():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        reads = iter(["old", "new"])
+
+        async def read():
+            value = next(reads)
+            await release.wait()
+            return value
+
+        early = asyncio.ensure_future(flights.do("k", read))
+        while flights.mark() == 0:
+            # Until the first read has begun
+            await asyncio.sleep(0)
+        # Needs a value read after this point, such as after a vote it saw
+        late = asyncio.ensure_future(flights.do("k", read, flights.mark()))
+        await asyncio.sleep(0)
+        release.set()
+        return await early, await late, flights.collapsed
+
+    assert asyncio.run(run()) == ("old", "new", 0)
+
+
+def test_errors_reach_every_caller():
+    async def run():
+        flights = SingleFlight()
+
+        async def read():
+            await asyncio.sleep(0)
+            raise RuntimeError("database unavailable")
+
+        return await asyncio.gather(
+            flights.do("k", read), flights.do("k", read), return_exceptions=True
+        )
+
+    assert [type(e) for e in asyncio.run(run())] == [RuntimeError, RuntimeError]
+
+
+def test_threads_share_one_flight():
+    flights = ThreadSingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", read)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(flights.do("k", read)))
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    while flights.collapsed < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError):
+        flights.do("k", lambda: int("x"))
+
+
+def test_concurrent_subscribers_share_the_snapshot_read(monkeypatch):
+    db = SessionLocal()
+    poll = crud.create_poll(
+        db,
+        schemas.PollCreate(
+            title="Shared", question="?", choices=[schemas.ChoiceCreate(text="a")]
+        ),
+    )
+    poll_id = poll.id
+    db.close()
+    reads = []
+    find_poll_results_async = crud.find_poll_results_async
+
+    async def counted(db, poll_id):
+        reads.append(poll_id)
+        await asyncio.sleep(0.01)
+        return await find_poll_results_async(db, poll_id)
+
+    monkeypatch.setattr(cm.crud, "find_poll_results_async", counted)
+
+    async def run():
+        manager = cm.ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(10)]
+        for ws in sockets:
+            await manager.connect(ws)  # type: ignore
+        tally_cache.clear()
+        subscribed = await asyncio.gather(
+            *(manager.subscribe_to_poll(ws, poll_id) for ws in sockets)  # type: ignore
+        )
+        return manager, subscribed
+
+    manager, subscribed = asyncio.run(run())
+    assert all(subscribed)
+    assert len(reads) == 1
+    assert manager.reads.collapsed >= 9
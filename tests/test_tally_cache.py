@@ -0,0 +1,86 @@
+import json
+
+from polling_app.utils.tally_cache import TallyCache, tally_cache
+from tests import assertion_helper
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_query_counts import count_queries
+
+
+def test_lru_eviction():
+    cache = TallyCache(max_polls=2)
+    for poll_id in ["a", "b", "c"]:
+        cache.put(poll_id, [{"id": "x", "text": "X", "votes": 0}], cache.generation())
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+
+
+def test_load_racing_with_write_is_not_stored():
+    cache = TallyCache()
+    generation = cache.generation()
+    # A vote lands on an uncached poll while its tally is being loaded
+    cache.increment("a", "x")
+    cache.put("a", [{"id": "x", "text": "X", "votes": 0}], generation)
+    assert cache.get("a") is None
+
+
+def test_stale_load_does_not_overwrite_entry():
+    cache = TallyCache()
+    stale = cache.generation()
+    cache.put("a", [{"id": "x", "text": "X", "votes": 0}], cache.generation())
+    cache.increment("a", "x")
+    # A second load that read the tally before the vote finishes last
+    cache.put("a", [{"id": "x", "text": "X", "votes": 0}], stale)
+    assert cache.get("a")[0]["votes"] == 1
+
+
+class TestTallyCache(TestBase):
+    def test_vote_broadcast_served_from_cache(self):
+        poll = create_color_poll(self.client)
+        poll_id = poll["id"]
+        choice_id = poll["choices"][0]["id"]
+        with self.client.websocket_connect(f"/polls/ws/{poll_id}") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            assertion_helper.assert_successful_subscription(
+                ws.receive_text(), poll_id, choice_id, 0
+            )
+            with count_queries() as statements:
+                res = self.client.post(
+                    f"/polls/{poll_id}/vote",
+                    json={"username": "alice", "choice_id": choice_id},
+                )
+            assert res.status_code == 200
+            assertion_helper.assert_result_update(
+                ws.receive_text(), poll_id, choice_id, 1
+            )
+        assert not any("count(votes.id)" in s for s in statements)
+        assertion_helper.assert_vote_count(tally_cache.get(poll_id), choice_id, 1)
+
+    def test_get_poll_matches_database_after_votes(self):
+        poll = create_color_poll(self.client)
+        poll_id = poll["id"]
+        for username in ["alice", "bob"]:
+            self.client.post(
+                f"/polls/{poll_id}/vote",
+                json={"username": username, "choice_id": poll["choices"][1]["id"]},
+            )
+        cached = self.client.get(f"/polls/{poll_id}").json()
+        tally_cache.clear()
+        assert self.client.get(f"/polls/{poll_id}").json() == cached
+
+    def test_delete_invalidates(self):
+        poll = create_color_poll(self.client)
+        assert tally_cache.get(poll["id"]) is not None
+        self.client.delete(f"/polls/{poll['id']}")
+        assert tally_cache.get(poll["id"]) is None
+
+    def test_subscribe_served_from_cache(self):
+        poll = create_color_poll(self.client)
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            with count_queries() as statements:
+                ws.send_text(json.dumps({"action": "subscribe", "poll_id": poll["id"]}))
+                ws.receive_text()
+        # A cached tally also proves the poll exists
+        assert len(statements) == 0
@@ -0,0 +1,87 @@
+import json
+
+from polling_app.database import SessionLocal
+from polling_app.models import Choice
+from polling_app.routers import voting
+from polling_app.utils.connection_manager import connection_manager
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_query_counts import count_queries
+
+
+class TestVoteBatch(TestBase):
+    def setup_method(self):
+        self.poll = create_color_poll(self.client)
+        self.url = f"/polls/{self.poll['id']}/votes:batch"
+        self.red, self.green = [c["id"] for c in self.poll["choices"][:2]]
+
+    def vote_counts(self):
+        db = SessionLocal()
+        counts = [db.get(Choice, c).vote_count for c in (self.red, self.green)]
+        db.close()
+        return counts
+
+    def test_outcomes_per_vote(self):
+        self.client.post(
+            f"/polls/{self.poll['id']}/vote",
+            json={"username": "alice", "choice_id": self.red},
+        )
+        votes = [
+            {"username": "alice", "choice_id": self.green},
+            {"username": "bob", "choice_id": self.red},
+            {"username": "bob", "choice_id": self.green},
+            {"username": "carol", "choice_id": "999"},
+            {"username": "dave"},
+            {"username": "erin", "choice_id": self.green},
+        ]
+        res = self.client.post(self.url, json=votes)
+        assert res.status_code == 200
+        body = res.json()
+        assert (body["accepted"], body["rejected"]) == (2, 4)
+        assert [o.get("detail", o["status"]) for o in body["results"]] == [
+            "User has already voted in this poll",
+            "ok",
+            "User has already voted in this poll",
+            "Invalid choice",
+            "Invalid vote",
+            "ok",
+        ]
+        assert self.vote_counts() == [2, 1]
+        # The poll's version moved, so cached copies are revalidated
+        assert (
+            self.client.get(f"/polls/{self.poll['id']}").json()["choices"][0]["votes"]
+            == 2
+        )
+
+    def test_ndjson_in_chunks(self, monkeypatch):
+        monkeypatch.setattr(voting, "VOTE_BATCH_CHUNK_SIZE", 2)
+        broadcasts = []
+
+        async def broadcast(poll_id, action, data):
+            broadcasts.append([r["votes"] for r in data["results"]])
+
+        monkeypatch.setattr(connection_manager, "broadcast_to_poll", broadcast)
+        lines = [
+            json.dumps({"username": f"user{i}", "choice_id": self.green})
+            for i in range(5)
+        ]
+        body = "\n".join(lines[:2] + ["not json"] + lines[2:]) + "\n"
+        with count_queries() as statements:
+            res = self.client.post(
+                self.url,
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+        assert res.status_code == 200
+        assert res.json()["accepted"] == 5
+        assert res.json()["results"][2] == {"status": "error", "detail": "Invalid vote"}
+        assert self.vote_counts() == [0, 5]
+        # One broadcast per chunk of two votes
+        assert broadcasts == [[0, 2, 0], [0, 4, 0], [0, 5, 0]]
+        inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+        assert len(inserts) == 3
+
+    def test_unknown_poll_and_bad_body(self):
+        assert self.client.post("/polls/999/votes:batch", json=[]).status_code == 404
+        res = self.client.post(self.url, json={"username": "alice"})
+        assert res.status_code == 400
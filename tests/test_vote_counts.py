@@ -0,0 +1,76 @@
+from sqlalchemy import create_engine, inspect, text
+
+from polling_app import cli, crud
+from polling_app.database import SessionLocal
+from polling_app.models import Choice
+from tests.base import TestBase
+from tests.helper import create_color_poll
+
+
+class TestVoteCounts(TestBase):
+    def vote(self, poll: dict, username: str, index: int = 0):
+        res = self.client.post(
+            f"/polls/{poll['id']}/vote",
+            json={"username": username, "choice_id": poll["choices"][index]["id"]},
+        )
+        assert res.status_code == 200
+
+    def test_vote_increments_counter(self):
+        poll = create_color_poll(self.client)
+        self.vote(poll, "alice")
+        self.vote(poll, "bob")
+        db = SessionLocal()
+        choice = db.get(Choice, poll["choices"][0]["id"])
+        assert choice.vote_count == 2
+        db.close()
+
+    def test_reconcile_and_check(self, capsys):
+        poll = create_color_poll(self.client)
+        self.vote(poll, "alice")
+        db = SessionLocal()
+        choice = db.get(Choice, poll["choices"][0]["id"])
+        choice.vote_count = 7
+        db.commit()
+
+        assert any(
+            m["choice_id"] == choice.id and m["counted"] == 1
+            for m in crud.find_vote_count_mismatches(db)
+        )
+        assert cli.main(["check"]) == 1
+        assert cli.main(["reconcile"]) == 0
+        assert cli.main(["check"]) == 0
+        assert "vote counts are consistent" in capsys.readouterr().out
+
+        db.refresh(choice)
+        assert choice.vote_count == 1
+        db.close()
+
+
+def test_reconcile_upgrades_old_schema(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with bind.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE choices (id VARCHAR PRIMARY KEY, text VARCHAR NOT NULL,"
+                " poll_id VARCHAR)"
+            )
+        )
+        conn.execute(text("INSERT INTO choices VALUES ('c1', 'red', 'p1')"))
+        conn.execute(
+            text(
+                "CREATE TABLE votes (id VARCHAR PRIMARY KEY, choice_id VARCHAR,"
+                " username VARCHAR NOT NULL, timestamp DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO votes VALUES ('v1', 'c1', 'alice', NULL)"))
+
+    added = cli.upgrade_schema(bind)
+    assert "choices.vote_count" in added
+    assert "votes.poll_id" in added
+    assert "ix_votes_poll_id_username" in added
+    assert "vote_count" in {c["name"] for c in inspect(bind).get_columns("choices")}
+
+    cli.reconcile(bind)
+    with bind.connect() as conn:
+        assert conn.execute(text("SELECT vote_count FROM choices")).scalar() == 1
+        assert conn.execute(text("SELECT poll_id FROM votes")).scalar() == "p1"
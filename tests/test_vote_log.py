@@ -0,0 +1,138 @@
+import os
+import threading
+import uuid
+
+import pytest
+
+from polling_app import cli, crud
+from polling_app.database import SessionLocal
+from polling_app.models import Choice, Vote
+from polling_app.utils.vote_log import RECORD_SIZE, VoteLog, VoteLogLockedError
+from tests.base import TestBase
+from tests.helper import create_color_poll
+
+POLL = str(uuid.uuid4())
+RED, GREEN = str(uuid.uuid4()), str(uuid.uuid4())
+
+
+def test_rejects_second_votes_and_recovers(tmp_path):
+    log = VoteLog(str(tmp_path), fsync=False)
+    assert log.append(POLL, RED, "alice")
+    assert log.append_many(POLL, [(GREEN, "bob"), (RED, "alice"), (RED, "bob")]) == [
+        True,
+        False,
+        False,
+    ]
+    log.close()
+
+    log = VoteLog(str(tmp_path), fsync=False)
+    assert (log.count(POLL, RED), log.count(POLL, GREEN)) == (1, 1)
+    assert not log.append(POLL, GREEN, "alice")
+    assert log.total(POLL) == 2
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    log = VoteLog(str(tmp_path), fsync=False)
+    log.append(POLL, RED, "alice")
+    log.append(POLL, RED, "bob")
+    log.close()
+    segment = tmp_path / "00000000.log"
+    # A crash halfway through the second record
+    os.truncate(segment, RECORD_SIZE + 10)
+
+    log = VoteLog(str(tmp_path), fsync=False)
+    assert log.count(POLL, RED) == 1
+    assert os.path.getsize(segment) == RECORD_SIZE
+    # bob's vote was lost, so he can vote again
+    assert log.append(POLL, RED, "bob")
+
+
+def test_snapshots_and_compaction(tmp_path):
+    log = VoteLog(str(tmp_path), snapshot_every=2, fsync=False)
+    for user in ["a", "b", "c"]:
+        log.append(POLL, RED, user)
+    other = str(uuid.uuid4())
+    log.append(other, GREEN, "a")
+    log.forget(other)
+    segments = sorted(n for n in os.listdir(tmp_path) if n.endswith(".log"))
+    assert segments == ["00000000.log", "00000001.log", "00000002.log"]
+    assert log.compact() == 3
+    assert sorted(os.listdir(tmp_path)) == ["00000003.log", "LOCK", "snapshot.json"]
+    log.append(POLL, GREEN, "d")
+    log.close()
+
+    log = VoteLog(str(tmp_path), fsync=False)
+    assert (log.count(POLL, RED), log.count(POLL, GREEN)) == (3, 1)
+    assert log.total(other) == 0
+    assert not log.append(POLL, GREEN, "c")
+
+
+def test_log_is_locked_by_its_process(tmp_path, capsys):
+    log = VoteLog(str(tmp_path), fsync=False)
+    log.append(POLL, RED, "alice")
+    with pytest.raises(VoteLogLockedError):
+        VoteLog(str(tmp_path), fsync=False)
+    # Compacting from another process waits for the server to stop
+    assert cli.compact(str(tmp_path)) == 1
+    assert "in use" in capsys.readouterr().out
+    log.close()
+
+    assert cli.compact(str(tmp_path)) == 0
+    log = VoteLog(str(tmp_path), fsync=False)
+    assert log.count(POLL, RED) == 1
+
+
+class TestVoteLogStore(TestBase):
+    @pytest.fixture(autouse=True)
+    def vote_log(self, tmp_path, monkeypatch):
+        log = VoteLog(str(tmp_path), fsync=False)
+        monkeypatch.setattr(crud, "vote_log", log)
+        yield log
+        log.close()
+
+    def test_votes_are_kept_in_the_log(self, vote_log, monkeypatch):
+        threads = []
+        append_many = vote_log.append_many
+
+        def recorded(*args):
+            threads.append(threading.get_ident())
+            return append_many(*args)
+
+        monkeypatch.setattr(vote_log, "append_many", recorded)
+        poll = create_color_poll(self.client)
+        poll_id, red = poll["id"], poll["choices"][0]["id"]
+        url = f"/polls/{poll_id}/vote"
+        etag = self.client.get(f"/polls/{poll_id}").headers["etag"]
+
+        assert (
+            self.client.post(url, json={"username": "a", "choice_id": red}).status_code
+            == 200
+        )
+        res = self.client.post(url, json={"username": "a", "choice_id": red})
+        assert res.json()["detail"] == "User has already voted in this poll"
+        res = self.client.post(
+            f"/polls/{poll_id}/votes:batch",
+            json=[
+                {"username": "b", "choice_id": red},
+                {"username": "a", "choice_id": red},
+            ],
+        )
+        assert res.json()["accepted"] == 1
+
+        res = self.client.get(f"/polls/{poll_id}")
+        assert res.headers["etag"] != etag
+        assert res.json()["choices"][0]["votes"] == 2
+        assert vote_log.count(poll_id, red) == 2
+        db = SessionLocal()
+        assert db.query(Vote).filter(Vote.poll_id == poll_id).count() == 0
+        assert db.get(Choice, red).vote_count == 0
+        db.close()
+
+        # Appends fsync, so they stay off the event loop
+        loop_thread = self.client.portal.call(threading.get_ident)
+        assert threads and loop_thread not in threads
+
+        res = self.client.post("/admin/vote-log/compact")
+        assert res.json() == {"deleted_segments": 1}
+        self.client.delete(f"/polls/{poll_id}")
+        assert vote_log.total(poll_id) == 0
@@ -0,0 +1,73 @@
+import asyncio
+
+from polling_app import schemas
+from polling_app.database import SessionLocal
+from polling_app.models import Choice
+from polling_app.routers import voting
+from polling_app.utils.vote_writer import VoteWriter
+from tests.base import TestBase
+from tests.helper import create_color_poll
+from tests.test_query_counts import count_queries
+
+
+class TestVoteWriter(TestBase):
+    def setup_method(self):
+        self.poll = create_color_poll(self.client)
+        self.poll_id = self.poll["id"]
+        self.choice_id = self.poll["choices"][0]["id"]
+
+    def vote_count(self):
+        db = SessionLocal()
+        count = db.get(Choice, self.choice_id).vote_count
+        db.close()
+        return count
+
+    def test_concurrent_votes_share_one_commit(self):
+        def vote(username, choice_id=None):
+            return schemas.VoteCreate(
+                username=username, choice_id=choice_id or self.choice_id
+            )
+
+        async def run():
+            writer = VoteWriter(max_delay_ms=1000, max_batch=5)
+            await writer.start()
+            votes = [vote("alice"), vote("bob"), vote("alice"), vote("carol", "999")]
+            submitted = [writer.submit(self.poll_id, v) for v in votes]
+            submitted.append(writer.submit("missing", vote("dave")))
+            # The fifth vote fills the group, which commits without waiting
+            outcomes = await asyncio.wait_for(asyncio.gather(*submitted), 0.5)
+            await writer.stop()
+            return writer, outcomes
+
+        with count_queries() as statements:
+            writer, outcomes = asyncio.run(run())
+        assert [o.get("detail", o["status"]) for o in outcomes] == [
+            "ok",
+            "ok",
+            "User has already voted in this poll",
+            "Invalid choice",
+            "Poll not found",
+        ]
+        assert writer.commits == 1
+        assert sum(1 for s in statements if s.startswith("INSERT")) == 1
+        assert self.vote_count() == 2
+
+    def test_vote_route_in_write_behind_mode(self, monkeypatch):
+        writer = VoteWriter(max_delay_ms=5)
+        monkeypatch.setattr(voting, "vote_writer", writer)
+        self.client.portal.call(writer.start)
+        try:
+            payload = {"username": "alice", "choice_id": self.choice_id}
+            url = f"/polls/{self.poll_id}/vote"
+            assert self.client.post(url, json=payload).json() == {"status": "ok"}
+            res = self.client.post(url, json=payload)
+            assert res.status_code == 400
+            assert res.json()["detail"] == "User has already voted in this poll"
+            res = self.client.post("/polls/missing/vote", json=payload)
+            assert res.status_code == 404
+        finally:
+            self.client.portal.call(writer.stop)
+        assert self.vote_count() == 1
+        assert writer.commits == 3
+        stats = self.client.get("/polls/stats").json()
+        assert {"vote_group_commits", "purged_votes", "archived_polls"} <= set(stats)
@@ -2,9 +2,10 @@ import json
 
 import pytest
 
+from polling_app import constants as C
 from tests import assertion_helper
 from tests.base import TestBase
-from tests.helper import create_color_poll
+from tests.helper import create_color_poll, create_lunch_poll
 
 
 class TestWebSocket(TestBase):
@@ -122,3 +123,42 @@ class TestWebSocket(TestBase):
             # Disconnect
             ws.send_text(json.dumps({"action": "disconnect"}))
             assertion_helper.assert_successful_disconnect(ws.receive_text())
+
+    def test_subscribe_many(self):
+        poll_id = self.poll["id"]
+        choice_id = self.poll["choices"][0]["id"]
+        other_id = create_lunch_poll(self.client)["id"]
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            ws.send_text(json.dumps({"action": "subscribe", "poll_id": other_id}))
+            ws.receive_text()
+            message = {
+                "action": C.ACTION_SUBSCRIBE_MANY,
+                "poll_ids": [poll_id, "999", other_id, poll_id],
+            }
+            ws.send_text(json.dumps(message))
+            data = assertion_helper.assert_response_success(
+                ws.receive_text(), C.ACTION_SUBSCRIBE_MANY
+            )["data"]
+            assert [p["poll_id"] for p in data["polls"]] == [poll_id]
+            assertion_helper.assert_vote_count(
+                data["polls"][0]["results"], choice_id, 0
+            )
+            assert [(e["poll_id"], e["code"]) for e in data["errors"]] == [
+                ("999", C.ERR_POLL_NOT_FOUND),
+                (other_id, C.ERR_ALREADY_SUBSCRIBED),
+            ]
+
+            # Subscribed polls get live updates
+            self.add_vote(poll_id, choice_id)
+            assertion_helper.assert_result_update(
+                ws.receive_text(), poll_id, choice_id, 1
+            )
+
+    def test_subscribe_many_needs_a_list_of_ids(self):
+        with self.client.websocket_connect("/polls/ws") as ws:
+            assertion_helper.assert_successful_connect(ws.receive_text())
+            ws.send_text(json.dumps({"action": "subscribe_many", "poll_ids": "1"}))
+            assertion_helper.assert_unknown_action_error(
+                ws.receive_text(), "subscribe_many"
+            )